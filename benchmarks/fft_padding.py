@@ -0,0 +1,64 @@
+import argparse
+import glob
+import os
+import sys
+import time
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.fft_engine import next_fast_length
+
+
+RESOURCE_GLOB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             "resources", "**", "*.tif")
+
+# Prime and large-prime-factor sizes that are worst cases for np.fft
+SYNTHETIC_SHAPES = [(509, 509), (1009, 1009), (1021, 1019), (2003, 2003), (1031, 997)]
+
+
+def time_transforms(image: np.ndarray, shape, repeats: int) -> float:
+    # Only the forward and inverse transforms; s= zero-pads exactly like FFTEngine's padded mode
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        spectrum = np.fft.fft2(image, s=shape)
+        np.fft.ifft2(spectrum)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare native vs fast-size padded fft2 + ifft2 times")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--smoothness", type=int, default=5, choices=[5, 7])
+    args = parser.parse_args(argv)
+
+    cases = [(f"synthetic {h}x{w}", np.random.rand(h, w)) for h, w in SYNTHETIC_SHAPES]
+    for path in sorted(glob.glob(RESOURCE_GLOB, recursive=True)):
+        cases.append((os.path.basename(path), np.array(Image.open(path).convert('L'), dtype=np.float64)))
+
+    print(f"{'case':<48} {'native':>12} {'padded':>12} {'fast size':>12} {'speedup':>8}")
+    results = []
+    for name, image in cases:
+        fast_shape = tuple(next_fast_length(n, args.smoothness) for n in image.shape)
+        native = time_transforms(image, image.shape, args.repeats)
+        padded = time_transforms(image, fast_shape, args.repeats)
+        results.append((native, padded, image.size, name))
+        fast = f"{fast_shape[0]}x{fast_shape[1]}"
+        print(f"{name[:48]:<48} {native * 1000:>10.1f}ms {padded * 1000:>10.1f}ms {fast:>12} {native / padded:>7.2f}x")
+
+    speedups = [(native / padded, name) for native, padded, _, name in results]
+    best, best_name = max(speedups)
+    worst, worst_name = min(speedups)
+    # Worst case for native sizes: the slowest transform per pixel
+    native, padded, _, slowest_name = max(results, key=lambda r: r[0] / r[2])
+    print(f"\nWorst native case: {slowest_name} {native * 1000:.1f}ms -> {padded * 1000:.1f}ms "
+          f"padded ({native / padded:.2f}x)")
+    print(f"Largest speedup: {best:.2f}x ({best_name})")
+    print(f"Smallest speedup: {worst:.2f}x ({worst_name})")
+
+
+if __name__ == "__main__":
+    main()
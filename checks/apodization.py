@@ -0,0 +1,57 @@
+import argparse
+import glob
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.fft_engine import FFTEngine, WINDOW_HANN, WINDOW_TUKEY, WINDOW_KAISER
+from core.mask import RadialFilterMask, MaskType, FilterProfile
+from utils.image_utils import load_image_as_grayscale
+
+
+RESOURCE_GLOB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             "resources", "**", "*.tif")
+
+WINDOWS = [WINDOW_HANN, WINDOW_TUKEY, WINDOW_KAISER]
+
+FILTERS = [(MaskType.LOWPASS, FilterProfile.GAUSSIAN), (MaskType.LOWPASS, FilterProfile.BUTTERWORTH),
+           (MaskType.BANDREJECT, FilterProfile.GAUSSIAN)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that apodized, masked reconstructions match the "
+                                                 "unapodized result")
+    parser.add_argument("--cutoff", type=float, default=30.0)
+    parser.add_argument("--tolerance", type=float, default=1e-6,
+                        help="allowed deviation as a fraction of the source range")
+    args = parser.parse_args(argv)
+
+    failures = 0
+    for path in sorted(glob.glob(RESOURCE_GLOB, recursive=True)):
+        image = load_image_as_grayscale(path)
+        span = max(image.max() - image.min(), 1.0)
+        plain = FFTEngine()
+        plain.compute_fft(image)
+        for mask_type, profile in FILTERS:
+            mask = RadialFilterMask(mask_type, plain.amplitude.shape, profile=profile, cutoff=args.cutoff)
+            mask.set_intensity(0.0)
+            reference = plain.apply_mask(mask.mask_matrix)
+            # A reconstruction that ignored the mask must not pass
+            change = abs(reference - image).max() / span
+            
+            for window in WINDOWS:
+                engine = FFTEngine(window=window)
+                engine.compute_fft(image)
+                error = abs(engine.apply_mask(mask.mask_matrix) - reference).max() / span
+                if error > args.tolerance or change <= args.tolerance:
+                    failures += 1
+                    print(f"FAIL {os.path.basename(path)} {window} {profile.value} {mask_type.value}: "
+                          f"deviation {error:.2e}, filter change {change:.2e}")
+
+    print("OK" if not failures else f"{failures} reconstructions differ from the unapodized result")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
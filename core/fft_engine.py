@@ -1,31 +1,171 @@
 import numpy as np
+from functools import lru_cache
 from typing import Tuple
+from .spectrum_cache import SpectrumCache, image_key
+
+
+PAD_ZERO = "zero"
+PAD_MIRROR = "mirror"
+
+_PAD_MODES = {PAD_ZERO: "constant", PAD_MIRROR: "symmetric"}
+
+WINDOW_HANN = "hann"
+WINDOW_TUKEY = "tukey"
+WINDOW_KAISER = "kaiser"
+
+# Tukey taper fraction and Kaiser beta used when no parameter is given
+_WINDOW_DEFAULTS = {WINDOW_HANN: None, WINDOW_TUKEY: 0.5, WINDOW_KAISER: 6.0}
+
+
+@lru_cache(maxsize=32)
+def window_vector(kind: str, n: int, param: float = None) -> np.ndarray:
+    if kind == WINDOW_HANN:
+        window = np.hanning(n + 2)[1:-1]
+    elif kind == WINDOW_TUKEY:
+        alpha = _WINDOW_DEFAULTS[kind] if param is None else param
+        t = np.arange(1, n + 1) / (n + 1)
+        window = np.ones(n)
+        if alpha > 0:
+            edge = np.minimum(t, 1.0 - t)
+            taper = edge < alpha / 2
+            window[taper] = 0.5 * (1.0 - np.cos(2.0 * np.pi * edge[taper] / alpha))
+    elif kind == WINDOW_KAISER:
+        beta = _WINDOW_DEFAULTS[kind] if param is None else param
+        window = np.kaiser(n, beta)
+    else:
+        raise ValueError(f"Unknown window: {kind}")
+    window.flags.writeable = False
+    return window
+
+
+def next_fast_length(n: int, smoothness: int = 5) -> int:
+    primes = [p for p in (2, 3, 5, 7) if p <= smoothness]
+    m = max(n, 1)
+    while True:
+        k = m
+        for p in primes:
+            while k % p == 0:
+                k //= p
+        if k == 1:
+            return m
+        m += 1
 
 
 class FFTEngine:
-    def __init__(self):
+    def __init__(self, cache: SpectrumCache = None, padding: str = None, smoothness: int = 5,
+                 window: str = None, window_param: float = None):
+        if padding is not None and padding not in _PAD_MODES:
+            raise ValueError(f"Unknown padding mode: {padding}")
+        if window is not None and window not in _WINDOW_DEFAULTS:
+            raise ValueError(f"Unknown window: {window}")
         self.original_image: np.ndarray = None
-        self.fft_shifted: np.ndarray = None
         self.amplitude: np.ndarray = None
         self.phase: np.ndarray = None
+        self.cache = cache
+        self.padding = padding
+        self.smoothness = smoothness
+        self.window = window
+        self.window_param = window_param
+        self.native_shape: Tuple[int, int] = None
+        self.padded_shape: Tuple[int, int] = None
+        self._fft_shifted: np.ndarray = None
+        # Unshifted spectrum of the unwindowed image; only kept when a window is set
+        self._plain_fft: np.ndarray = None
         
+    @property
+    def fft_shifted(self) -> np.ndarray:
+        # Cache hits only restore amplitude/phase; rebuild the complex spectrum on demand
+        if self._fft_shifted is None and self.amplitude is not None:
+            self._fft_shifted = self.amplitude * np.exp(1j * self.phase)
+        return self._fft_shifted
+    
+    def _cache_settings(self, window: str) -> Tuple:
+        return ("numpy.fft", np.dtype(np.complex128).str, self.padded_shape, self.padding,
+                window, self.window_param if window is not None else None)
+    
+    def _windowed(self, image: np.ndarray, window: str) -> np.ndarray:
+        if window is None:
+            return image
+        h, w = self.native_shape
+        windowed = image * window_vector(window, h, self.window_param)[:, None]
+        windowed *= window_vector(window, w, self.window_param)
+        return windowed
+    
+    def _padded(self, image: np.ndarray) -> np.ndarray:
+        if self.padded_shape == self.native_shape:
+            return image
+        # Pad after the last row/column so native coordinates stay at the origin
+        pad = [(0, p - n) for p, n in zip(self.padded_shape, self.native_shape)]
+        return np.pad(image, pad, mode=_PAD_MODES[self.padding])
+    
     def compute_fft(self, image: np.ndarray) -> None:
         self.original_image = image.copy()
-        fft = np.fft.fft2(image)
-        self.fft_shifted = np.fft.fftshift(fft)
-        self.amplitude = np.abs(self.fft_shifted)
-        self.phase = np.angle(self.fft_shifted)
+        self.native_shape = image.shape
+        if self.padding is None:
+            self.padded_shape = self.native_shape
+        else:
+            self.padded_shape = tuple(next_fast_length(n, self.smoothness) for n in self.native_shape)
+        
+        self.amplitude, self.phase, self._fft_shifted = self._spectrum(self.window)
+        self._plain_fft = None
+        if self.window is not None:
+            # The windowed spectrum is only for display and mask placement; masks are applied
+            # to the plain spectrum so nothing has to be divided back out of the result
+            amplitude, phase, plain = self._spectrum(None)
+            if plain is None:
+                plain = amplitude * np.exp(1j * phase)
+            self._plain_fft = np.fft.ifftshift(plain)
+    
+    def _spectrum(self, window: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        key = None
+        if self.cache is not None:
+            key = image_key(self.original_image, *self._cache_settings(window))
+            cached = self.cache.load(key)
+            if cached is not None:
+                amplitude, phase = cached
+                return amplitude, phase, None
+        
+        fft_shifted = np.fft.fftshift(np.fft.fft2(self._padded(self._windowed(self.original_image, window))))
+        amplitude = np.abs(fft_shifted)
+        phase = np.angle(fft_shifted)
+        
+        if key is not None:
+            self.cache.store(key, amplitude, phase)
+        return amplitude, phase, fft_shifted
     
     def get_log_magnitude_spectrum(self) -> np.ndarray:
         if self.amplitude is None:
             return None
         return np.log1p(self.amplitude)
     
+    def _cropped(self, reconstructed: np.ndarray) -> np.ndarray:
+        if self.native_shape is not None:
+            h, w = self.native_shape
+            reconstructed = reconstructed[:h, :w]
+        return np.real(reconstructed)
+    
     def reconstruct_image(self, modified_amplitude: np.ndarray) -> np.ndarray:
+        # Inverts the displayed spectrum, so with a window this is the apodized image; use apply_mask for edits
         modified_fft = modified_amplitude * np.exp(1j * self.phase)
         fft_ishifted = np.fft.ifftshift(modified_fft)
-        reconstructed = np.fft.ifft2(fft_ishifted)
-        return np.real(reconstructed)
+        return self._cropped(np.fft.ifft2(fft_ishifted))
+    
+    def native_to_padded(self, x: float, y: float) -> Tuple[float, float]:
+        # Spectrum coordinates scale about the centred DC term by the length ratio
+        (nh, nw), (ph, pw) = self.native_shape, self.padded_shape
+        return pw // 2 + (x - nw // 2) * pw / nw, ph // 2 + (y - nh // 2) * ph / nh
+    
+    def padded_to_native(self, x: float, y: float) -> Tuple[float, float]:
+        (nh, nw), (ph, pw) = self.native_shape, self.padded_shape
+        return nw // 2 + (x - pw // 2) * nw / pw, nh // 2 + (y - ph // 2) * nh / ph
+    
+    def apply_mask(self, combined_mask: np.ndarray) -> np.ndarray:
+        if combined_mask is None:
+            return self.original_image
+        if self._plain_fft is None:
+            return self.reconstruct_image(self.amplitude * combined_mask)
+        modified_fft = np.fft.ifftshift(combined_mask) * self._plain_fft
+        return self._cropped(np.fft.ifft2(modified_fft))
     
     def reset(self) -> np.ndarray:
         return self.original_image.copy()
\ No newline at end of file
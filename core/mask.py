@@ -1,5 +1,8 @@
+import itertools
+import math
 import numpy as np
 from enum import Enum
+from functools import lru_cache
 from typing import Tuple, List
 
 
@@ -7,6 +10,19 @@ class MaskType(Enum):
     RECTANGLE = "Rectangle"
     CIRCLE = "Circle"
     FREEDRAW = "Free Draw"
+    LOWPASS = "Low-pass"
+    HIGHPASS = "High-pass"
+    BANDPASS = "Band-pass"
+    BANDREJECT = "Band-reject"
+
+
+RADIAL_MASK_TYPES = (MaskType.LOWPASS, MaskType.HIGHPASS, MaskType.BANDPASS, MaskType.BANDREJECT)
+
+
+class FilterProfile(Enum):
+    IDEAL = "Ideal"
+    BUTTERWORTH = "Butterworth"
+    GAUSSIAN = "Gaussian"
 
 
 class MaskMode(Enum):
@@ -14,8 +30,13 @@ class MaskMode(Enum):
     HIGHLIGHT = "Highlight"
 
 
+_mask_ids = itertools.count(1)
+
+
 class Mask:
     def __init__(self, mask_type: MaskType, shape: Tuple[int, int], mode: MaskMode = MaskMode.REMOVE):
+        self.mask_id = next(_mask_ids)
+        self.revision = 0
         self.mask_type = mask_type
         self.shape = shape
         self.mode = mode
@@ -24,6 +45,7 @@ class Mask:
         self.geometry = None
         self.mask_matrix: np.ndarray = None
         self.display_geometry = None
+        self.tiles: List[Tuple[slice, slice]] = []
         
     def set_geometry(self, geometry) -> None:
         self.geometry = geometry
@@ -38,6 +60,7 @@ class Mask:
         self._generate_mask()
     
     def _generate_mask(self) -> None:
+        self.revision += 1
         h, w = self.shape
         
         if self.mode == MaskMode.REMOVE:
@@ -84,19 +107,73 @@ class Mask:
             self.display_geometry = points
         
         self._apply_symmetry()
+        self._update_tiles()
     
     def _apply_symmetry(self) -> None:
         h, w = self.shape
-        cy, cx = h // 2, w // 2
+        expected_value = 1.0 if self.mode == MaskMode.REMOVE else 0.0
+        
+        # Point reflection about (h // 2, w // 2); for even sizes row/column 0 has no mirror
+        region = self.mask_matrix[1 - h % 2:, 1 - w % 2:]
+        mirrored = region[::-1, ::-1].copy()
+        np.copyto(region, mirrored, where=mirrored != expected_value)
+    
+    def _update_tiles(self) -> None:
+        # Disjoint pixel windows outside of which the mask is neutral (1 in Remove, 0 in Highlight)
+        h, w = self.shape
+        boxes = []
+        for x1, y1, x2, y2 in (self.get_bounds() if self.display_geometry else []):
+            x1, x2 = max(math.floor(x1), 0), min(math.ceil(x2) + 1, w)
+            y1, y2 = max(math.floor(y1), 0), min(math.ceil(y2) + 1, h)
+            if x1 < x2 and y1 < y2:
+                boxes.append((x1, y1, x2, y2))
         
-        for y in range(h):
-            for x in range(w):
-                expected_value = 1.0 if self.mode == MaskMode.REMOVE else 0.0
-                if self.mask_matrix[y, x] != expected_value:
-                    mirror_y = 2 * cy - y
-                    mirror_x = 2 * cx - x
-                    if 0 <= mirror_y < h and 0 <= mirror_x < w:
-                        self.mask_matrix[mirror_y, mirror_x] = self.mask_matrix[y, x]
+        if len(boxes) == 2:
+            (ax1, ay1, ax2, ay2), (bx1, by1, bx2, by2) = boxes
+            if ax1 < bx2 and bx1 < ax2 and ay1 < by2 and by1 < ay2:
+                boxes = [(min(ax1, bx1), min(ay1, by1), max(ax2, bx2), max(ay2, by2))]
+        
+        self.tiles = [(slice(y1, y2), slice(x1, x2)) for x1, y1, x2, y2 in boxes]
+    
+    def _mirror(self, x: float, y: float) -> Tuple[float, float]:
+        h, w = self.shape
+        return 2 * (w // 2) - x, 2 * (h // 2) - y
+    
+    def _primary_bounds(self) -> Tuple[float, float, float, float]:
+        if self.mask_type == MaskType.RECTANGLE:
+            return self.display_geometry
+        elif self.mask_type == MaskType.CIRCLE:
+            cx, cy, radius = self.display_geometry
+            return (cx - radius, cy - radius, cx + radius, cy + radius)
+        else:
+            ys = [p[0] for p in self.display_geometry]
+            xs = [p[1] for p in self.display_geometry]
+            return (min(xs), min(ys), max(xs) + 1, max(ys) + 1)
+    
+    def get_bounds(self) -> List[Tuple[float, float, float, float]]:
+        if self.display_geometry is None:
+            return []
+        
+        x1, y1, x2, y2 = self._primary_bounds()
+        mx2, my2 = self._mirror(x1, y1)
+        mx1, my1 = self._mirror(x2, y2)
+        return [(x1, y1, x2, y2), (mx1, my1, mx2, my2)]
+    
+    def _contains(self, x: float, y: float, tolerance: float) -> bool:
+        if self.mask_type == MaskType.RECTANGLE:
+            x1, y1, x2, y2 = self.display_geometry
+            return x1 - tolerance <= x <= x2 + tolerance and y1 - tolerance <= y <= y2 + tolerance
+        elif self.mask_type == MaskType.CIRCLE:
+            cx, cy, radius = self.display_geometry
+            return (x - cx) ** 2 + (y - cy) ** 2 <= (radius + tolerance) ** 2
+        else:
+            reach = (max(tolerance, 1.0) + 0.5) ** 2
+            return any((x - px) ** 2 + (y - py) ** 2 <= reach for py, px in self.display_geometry)
+    
+    def contains_point(self, x: float, y: float, tolerance: float = 0.0) -> bool:
+        if self.display_geometry is None:
+            return False
+        return self._contains(x, y, tolerance) or self._contains(*self._mirror(x, y), tolerance)
     
     def get_mask_matrix(self) -> np.ndarray:
         if not self.enabled or self.mask_matrix is None:
@@ -104,4 +181,280 @@ class Mask:
                 return np.ones(self.shape, dtype=np.float64)
             else:
                 return np.zeros(self.shape, dtype=np.float64)
-        return self.mask_matrix
\ No newline at end of file
+        return self.mask_matrix
+
+
+@lru_cache(maxsize=8)
+def radial_distance_grid(shape: Tuple[int, int]) -> np.ndarray:
+    h, w = shape
+    cy, cx = h // 2, w // 2
+    y, x = np.ogrid[:h, :w]
+    grid = np.hypot(y - cy, x - cx)
+    grid.setflags(write=False)
+    return grid
+
+
+class RadialFilterMask(Mask):
+    def __init__(self, mask_type: MaskType, shape: Tuple[int, int], mode: MaskMode = MaskMode.REMOVE,
+                 profile: FilterProfile = FilterProfile.GAUSSIAN, cutoff: float = 30.0,
+                 width: float = 10.0, order: int = 2):
+        if mask_type not in RADIAL_MASK_TYPES:
+            raise ValueError(f"{mask_type.value} is not a radial filter type")
+        super().__init__(mask_type, shape, mode)
+        self.profile = profile
+        self.order = order
+        self._scratch: np.ndarray = None
+        self.set_geometry((cutoff, width))
+    
+    @property
+    def cutoff(self) -> float:
+        return self.geometry[0]
+    
+    @property
+    def width(self) -> float:
+        return self.geometry[1]
+    
+    def set_cutoff(self, cutoff: float) -> None:
+        self.set_geometry((cutoff, self.width))
+    
+    def set_width(self, width: float) -> None:
+        self.set_geometry((self.cutoff, width))
+    
+    def set_order(self, order: int) -> None:
+        self.order = order
+        self._generate_mask()
+    
+    def set_profile(self, profile: FilterProfile) -> None:
+        self.profile = profile
+        self._generate_mask()
+    
+    def _generate_mask(self) -> None:
+        if self.geometry is None:
+            return
+        
+        self.revision += 1
+        if self.mask_matrix is None or self.mask_matrix.shape != tuple(self.shape):
+            self.mask_matrix = np.empty(self.shape, dtype=np.float64)
+            self._scratch = np.empty(self.shape, dtype=np.float64)
+        
+        out = self.mask_matrix
+        self._compute_response(out)
+        self.tiles = [(slice(0, self.shape[0]), slice(0, self.shape[1]))]
+        
+        # Passband stays at 1; the stopband is attenuated to the intensity in Remove mode
+        if self.mode == MaskMode.REMOVE:
+            out *= 1.0 - self.intensity
+            out += self.intensity
+        
+        h, w = self.shape
+        cutoff, width = self.geometry
+        if self.mask_type in (MaskType.LOWPASS, MaskType.HIGHPASS):
+            radii = (cutoff,)
+        else:
+            radii = (max(cutoff - width / 2, 0.0), cutoff + width / 2)
+        self.display_geometry = (w // 2, h // 2, radii)
+    
+    def get_bounds(self) -> List[Tuple[float, float, float, float]]:
+        if self.display_geometry is None:
+            return []
+        cx, cy, radii = self.display_geometry
+        radius = max(radii)
+        return [(cx - radius, cy - radius, cx + radius, cy + radius)]
+    
+    def contains_point(self, x: float, y: float, tolerance: float = 0.0) -> bool:
+        if self.display_geometry is None:
+            return False
+        cx, cy, radii = self.display_geometry
+        distance = np.hypot(x - cx, y - cy)
+        if len(radii) == 2 and radii[0] <= distance <= radii[1]:
+            return True
+        return any(abs(distance - radius) <= max(tolerance, 1.0) for radius in radii)
+    
+    def _compute_response(self, out: np.ndarray) -> None:
+        d = radial_distance_grid(tuple(self.shape))
+        d0 = max(float(self.cutoff), 1e-6)
+        band = max(float(self.width), 1e-6)
+        
+        if self.mask_type in (MaskType.LOWPASS, MaskType.HIGHPASS):
+            # Low-pass response; high-pass is its complement
+            if self.profile == FilterProfile.IDEAL:
+                np.less_equal(d, d0, out=out)
+            elif self.profile == FilterProfile.BUTTERWORTH:
+                np.divide(d, d0, out=out)
+                np.power(out, 2 * self.order, out=out)
+                out += 1.0
+                np.reciprocal(out, out=out)
+            else:
+                np.divide(d, d0, out=out)
+                np.square(out, out=out)
+                out *= -0.5
+                np.exp(out, out=out)
+            stop_complement = self.mask_type == MaskType.HIGHPASS
+        else:
+            # Band-reject response; band-pass is its complement
+            tmp = self._scratch
+            with np.errstate(divide='ignore', invalid='ignore'):
+                if self.profile == FilterProfile.IDEAL:
+                    np.subtract(d, d0, out=tmp)
+                    np.abs(tmp, out=tmp)
+                    np.greater(tmp, band / 2, out=out)
+                elif self.profile == FilterProfile.BUTTERWORTH:
+                    np.multiply(d, band, out=out)
+                    np.square(d, out=tmp)
+                    tmp -= d0 ** 2
+                    np.divide(out, tmp, out=out)
+                    np.power(out, 2 * self.order, out=out)
+                    out += 1.0
+                    np.reciprocal(out, out=out)
+                else:
+                    np.square(d, out=out)
+                    out -= d0 ** 2
+                    np.multiply(d, band, out=tmp)
+                    np.divide(out, tmp, out=out)
+                    np.square(out, out=out)
+                    np.negative(out, out=out)
+                    np.exp(out, out=out)
+                    np.subtract(1.0, out, out=out)
+                np.nan_to_num(out, copy=False, nan=1.0)
+            stop_complement = self.mask_type == MaskType.BANDPASS
+        
+        if stop_complement:
+            np.subtract(1.0, out, out=out)
+
+
+def mask_to_dict(mask: Mask) -> dict:
+    geometry = mask.geometry
+    if mask.mask_type == MaskType.FREEDRAW:
+        geometry = [list(point) for point in geometry]
+    elif geometry is not None:
+        geometry = list(geometry)
+    
+    data = {
+        "type": mask.mask_type.value,
+        "mode": mask.mode.value,
+        "intensity": mask.intensity,
+        "enabled": mask.enabled,
+        "geometry": geometry,
+    }
+    if isinstance(mask, RadialFilterMask):
+        data["profile"] = mask.profile.value
+        data["order"] = mask.order
+    return data
+
+
+def _number(value, name: str) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"{name} must be a finite number, got {value!r}")
+    return float(value)
+
+
+def _numbers(values, count: int, name: str) -> List[float]:
+    if not isinstance(values, (list, tuple)) or len(values) != count:
+        raise ValueError(f"{name} must be a list of {count} numbers, got {values!r}")
+    return [_number(v, name) for v in values]
+
+
+def _clamp(value: float, upper: int) -> int:
+    return min(max(int(round(value)), 0), upper)
+
+
+def validate_mask_dict(data: dict, shape: Tuple[int, int]) -> dict:
+    # Normalizes untrusted mask JSON (e.g. from the render server) into geometry the masks can index with
+    if not isinstance(data, dict):
+        raise ValueError(f"Mask must be an object, got {type(data).__name__}")
+    h, w = shape
+    mask_type = MaskType(data.get("type"))
+    mode = MaskMode(data.get("mode", MaskMode.REMOVE.value))
+    geometry = data.get("geometry")
+    
+    if mask_type == MaskType.RECTANGLE:
+        x1, y1, x2, y2 = _numbers(geometry, 4, "Rectangle geometry")
+        geometry = [_clamp(x1, w), _clamp(y1, h), _clamp(x2, w), _clamp(y2, h)]
+    elif mask_type == MaskType.CIRCLE:
+        cx, cy, radius = _numbers(geometry, 3, "Circle geometry")
+        if radius < 0:
+            raise ValueError(f"Circle radius must not be negative, got {radius}")
+        geometry = [cx, cy, radius]
+    elif mask_type == MaskType.FREEDRAW:
+        if not isinstance(geometry, (list, tuple)) or not geometry:
+            raise ValueError("Free draw geometry must be a non-empty list of [y, x] points")
+        points = []
+        for point in geometry:
+            y, x = _numbers(point, 2, "Free draw point")
+            points.append([_clamp(y, h - 1), _clamp(x, w - 1)])
+        geometry = points
+    else:
+        cutoff, width = _numbers(geometry, 2, f"{mask_type.value} geometry")
+        if cutoff < 0 or width < 0:
+            raise ValueError(f"{mask_type.value} cutoff and width must not be negative")
+        geometry = [cutoff, width]
+    
+    result = {
+        "type": mask_type.value,
+        "mode": mode.value,
+        "intensity": _number(data.get("intensity", 1.0), "Intensity"),
+        "enabled": bool(data.get("enabled", True)),
+        "geometry": geometry,
+    }
+    if mask_type in RADIAL_MASK_TYPES:
+        result["profile"] = FilterProfile(data.get("profile", FilterProfile.GAUSSIAN.value)).value
+        order = data.get("order", 2)
+        if isinstance(order, bool) or not isinstance(order, int) or order < 1:
+            raise ValueError(f"Filter order must be a positive integer, got {order!r}")
+        result["order"] = order
+    return result
+
+
+def mask_from_dict(data: dict, shape: Tuple[int, int]) -> Mask:
+    data = validate_mask_dict(data, shape)
+    mask_type = MaskType(data["type"])
+    mode = MaskMode(data["mode"])
+    geometry = data["geometry"]
+    
+    if mask_type in RADIAL_MASK_TYPES:
+        cutoff, width = geometry
+        mask = RadialFilterMask(mask_type, shape, mode, profile=FilterProfile(data["profile"]),
+                                cutoff=cutoff, width=width, order=data["order"])
+        mask.enabled = data["enabled"]
+        mask.set_intensity(data["intensity"])
+        return mask
+    
+    mask = Mask(mask_type, shape, mode)
+    mask.intensity = data["intensity"]
+    mask.enabled = data["enabled"]
+    if mask_type == MaskType.FREEDRAW:
+        geometry = [tuple(point) for point in geometry]
+    else:
+        geometry = tuple(geometry)
+    mask.set_geometry(geometry)
+    return mask
+
+
+def remap_mask(mask: Mask, shape: Tuple[int, int], point_map) -> Mask:
+    # point_map takes (x, y) in the mask's spectrum and returns (x, y) in the target spectrum
+    (x0, y0), (x1, y1) = point_map(0.0, 0.0), point_map(1.0, 1.0)
+    scale = ((x1 - x0) + (y1 - y0)) / 2
+    
+    data = mask_to_dict(mask)
+    if mask.geometry is None:
+        pass
+    elif mask.mask_type == MaskType.RECTANGLE:
+        ax, ay = point_map(*mask.geometry[:2])
+        bx, by = point_map(*mask.geometry[2:])
+        data["geometry"] = [int(round(ax)), int(round(ay)), int(round(bx)), int(round(by))]
+    elif mask.mask_type == MaskType.CIRCLE:
+        cx, cy, radius = mask.geometry
+        data["geometry"] = list(point_map(cx, cy)) + [radius * scale]
+    elif mask.mask_type == MaskType.FREEDRAW:
+        points = []
+        for y, x in mask.geometry:
+            mx, my = point_map(x, y)
+            point = [int(round(my)), int(round(mx))]
+            if point not in points[-1:]:
+                points.append(point)
+        data["geometry"] = points
+    else:
+        cutoff, width = mask.geometry
+        data["geometry"] = [cutoff * scale, width * scale]
+    
+    return mask_from_dict(data, shape)
@@ -0,0 +1,117 @@
+import math
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+from .mask import Mask
+
+
+class MaskSpatialIndex:
+    # Masks spanning more cells than this (e.g. wide radial filters) skip the grid
+    MAX_CELLS_PER_MASK = 1024
+
+    def __init__(self, cell_size: int = 32):
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], Set[int]] = defaultdict(set)
+        self._large: Set[int] = set()
+        self._entries: Dict[int, Tuple[Mask, List[Tuple[float, float, float, float]], List[Tuple[int, int]]]] = {}
+        self._order: Dict[int, int] = {}
+        self._counter = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, mask: Mask) -> bool:
+        return mask.mask_id in self._entries
+
+    def _clipped_bounds(self, mask: Mask) -> List[Tuple[float, float, float, float]]:
+        h, w = mask.shape
+        boxes = []
+        for x1, y1, x2, y2 in mask.get_bounds():
+            x1, x2 = max(x1, 0), min(x2, w)
+            y1, y2 = max(y1, 0), min(y2, h)
+            if x1 <= x2 and y1 <= y2:
+                boxes.append((x1, y1, x2, y2))
+        return boxes
+
+    def _cell_range(self, x1: float, y1: float, x2: float, y2: float):
+        size = self.cell_size
+        return (range(math.floor(x1 / size), math.floor(x2 / size) + 1),
+                range(math.floor(y1 / size), math.floor(y2 / size) + 1))
+
+    def insert(self, mask: Mask) -> None:
+        if mask.mask_id in self._entries:
+            self.remove(mask)
+
+        boxes = self._clipped_bounds(mask)
+        cells = []
+        for box in boxes:
+            cols, rows = self._cell_range(*box)
+            cells.extend((col, row) for col in cols for row in rows)
+
+        if len(cells) > self.MAX_CELLS_PER_MASK:
+            self._large.add(mask.mask_id)
+            cells = []
+        for cell in cells:
+            self._cells[cell].add(mask.mask_id)
+
+        self._entries[mask.mask_id] = (mask, boxes, cells)
+        self._counter += 1
+        self._order.setdefault(mask.mask_id, self._counter)
+
+    def update(self, mask: Mask) -> None:
+        order = self._order.get(mask.mask_id)
+        self.insert(mask)
+        if order is not None:
+            self._order[mask.mask_id] = order
+
+    def remove(self, mask: Mask) -> None:
+        entry = self._entries.pop(mask.mask_id, None)
+        if entry is None:
+            return
+        for cell in entry[2]:
+            bucket = self._cells[cell]
+            bucket.discard(mask.mask_id)
+            if not bucket:
+                del self._cells[cell]
+        self._large.discard(mask.mask_id)
+        self._order.pop(mask.mask_id, None)
+
+    def clear(self) -> None:
+        self._cells.clear()
+        self._large.clear()
+        self._entries.clear()
+        self._order.clear()
+
+    def _candidates(self, x1: float, y1: float, x2: float, y2: float) -> Set[int]:
+        found = set(self._large)
+        cols, rows = self._cell_range(x1, y1, x2, y2)
+        if len(cols) * len(rows) > len(self._cells):
+            # Query covers most of the grid; walking the occupied cells is cheaper
+            for (col, row), bucket in self._cells.items():
+                if col in cols and row in rows:
+                    found |= bucket
+        else:
+            for col in cols:
+                for row in rows:
+                    bucket = self._cells.get((col, row))
+                    if bucket:
+                        found |= bucket
+        return found
+
+    def query_rect(self, x1: float, y1: float, x2: float, y2: float) -> List[Mask]:
+        x1, x2 = min(x1, x2), max(x1, x2)
+        y1, y2 = min(y1, y2), max(y1, y2)
+
+        hits = []
+        for mask_id in self._candidates(x1, y1, x2, y2):
+            mask, boxes, _ = self._entries[mask_id]
+            if any(bx1 <= x2 and x1 <= bx2 and by1 <= y2 and y1 <= by2 for bx1, by1, bx2, by2 in boxes):
+                hits.append(mask)
+
+        hits.sort(key=lambda m: self._order[m.mask_id])
+        return hits
+
+    def query_point(self, x: float, y: float, tolerance: float = 0.0) -> List[Mask]:
+        candidates = self.query_rect(x - tolerance, y - tolerance, x + tolerance, y + tolerance)
+        hits = [m for m in candidates if m.contains_point(x, y, tolerance)]
+        hits.reverse()
+        return hits
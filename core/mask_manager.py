@@ -1,6 +1,7 @@
 import numpy as np
 from typing import List
 from .mask import Mask, MaskMode
+from .mask_index import MaskSpatialIndex
 
 
 class MaskManager:
@@ -8,46 +9,68 @@ class MaskManager:
         self.masks: List[Mask] = []
         self.current_mask: Mask = None
         self.current_mode: MaskMode = MaskMode.REMOVE
+        self.index = MaskSpatialIndex()
     
     def add_mask(self, mask: Mask) -> None:
         self.masks.append(mask)
         self.current_mask = mask
+        self.index.insert(mask)
     
     def remove_mask(self, mask: Mask) -> None:
         if mask in self.masks:
             self.masks.remove(mask)
+            self.index.remove(mask)
             if self.current_mask == mask:
                 self.current_mask = None
     
+    def refresh_mask(self, mask: Mask) -> None:
+        if mask in self.index:
+            self.index.update(mask)
+    
+    def masks_at(self, x: float, y: float, tolerance: float = 0.0) -> List[Mask]:
+        return self.index.query_point(x, y, tolerance)
+    
+    def masks_in_rect(self, x1: float, y1: float, x2: float, y2: float) -> List[Mask]:
+        return self.index.query_rect(x1, y1, x2, y2)
+    
     def set_mode(self, mode: MaskMode) -> None:
         self.current_mode = mode
         for mask in self.masks:
             mask.set_mode(mode)
     
+    def state_key(self) -> tuple:
+        return tuple((m.mask_id, m.revision, m.enabled) for m in self.masks)
+    
     def get_masks_by_mode(self, mode: MaskMode) -> List[Mask]:
         return [m for m in self.masks if m.mode == mode]
     
-    def get_combined_mask(self) -> np.ndarray:
-        if not self.masks:
-            return None
-        
-        active_masks = [m for m in self.masks if m.enabled and m.mode == self.current_mode]
+    def get_combined_mask(self, out: np.ndarray = None) -> np.ndarray:
+        active_masks = [m for m in self.masks if m.enabled and m.mask_matrix is not None]
         
         if not active_masks:
             return None
         
-        if self.current_mode == MaskMode.REMOVE:
-            combined = np.ones(self.masks[0].shape, dtype=np.float64)
-            for mask in active_masks:
-                combined *= mask.get_mask_matrix()
-        else:  # HIGHLIGHT mode
-            combined = np.zeros(self.masks[0].shape, dtype=np.float64)
-            for mask in active_masks:
-                mask_matrix = mask.get_mask_matrix()
-                combined = np.maximum(combined, mask_matrix)
+        highlight_masks = [m for m in active_masks if m.mode == MaskMode.HIGHLIGHT]
+        remove_masks = [m for m in active_masks if m.mode == MaskMode.REMOVE]
+        
+        if out is None:
+            out = np.empty(active_masks[0].shape, dtype=np.float64)
+        
+        # Highlight layers choose what passes (their union), Remove layers then attenuate it.
+        # Each mask only touches its own tiles since it is neutral everywhere else.
+        out.fill(0.0 if highlight_masks else 1.0)
+        for mask in highlight_masks:
+            for tile in mask.tiles:
+                view = out[tile]
+                np.maximum(view, mask.mask_matrix[tile], out=view)
+        for mask in remove_masks:
+            for tile in mask.tiles:
+                view = out[tile]
+                np.multiply(view, mask.mask_matrix[tile], out=view)
         
-        return combined
+        return out
     
     def clear_all(self) -> None:
         self.masks.clear()
+        self.index.clear()
         self.current_mask = None
\ No newline at end of file
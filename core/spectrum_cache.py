@@ -0,0 +1,157 @@
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "fd-editor", "spectra")
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+# Set to a directory to move the cache or to "off" to disable it; the size cap is in MB
+CACHE_DIR_ENV = "FD_EDITOR_SPECTRUM_CACHE"
+CACHE_SIZE_ENV = "FD_EDITOR_SPECTRUM_CACHE_MB"
+
+_DISABLED = ("off", "0", "false", "no")
+
+_ARRAY_NAMES = ("amplitude", "phase")
+
+
+def image_key(image: np.ndarray, *settings) -> str:
+    digest = hashlib.sha256()
+    digest.update(repr((image.shape, image.dtype.str) + settings).encode())
+    digest.update(memoryview(np.ascontiguousarray(image)).cast("B"))
+    return digest.hexdigest()
+
+
+class SpectrumCache:
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def load(self, key: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        path = self._entry_path(key)
+        try:
+            arrays = tuple(np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+                           for name in _ARRAY_NAMES)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        # Entry mtime doubles as the LRU timestamp
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return arrays
+
+    def store(self, key: str, amplitude: np.ndarray, phase: np.ndarray) -> None:
+        path = self._entry_path(key)
+        if os.path.isdir(path):
+            return
+
+        # The cache is best-effort: a full or read-only disk must never fail the FFT itself
+        staging = f"{path}.tmp-{os.getpid()}"
+        try:
+            os.makedirs(staging, exist_ok=True)
+            for name, array in zip(_ARRAY_NAMES, (amplitude, phase)):
+                np.save(os.path.join(staging, f"{name}.npy"), array)
+            os.rename(staging, path)
+            self.evict()
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def _entries(self) -> Dict[str, Tuple[float, int]]:
+        entries = {}
+        for key in os.listdir(self.directory):
+            path = self._entry_path(key)
+            if ".tmp-" in key or not os.path.isdir(path):
+                continue
+            try:
+                size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+                entries[key] = (os.path.getmtime(path), size)
+            except OSError:
+                continue
+        return entries
+
+    def evict(self) -> None:
+        entries = self._entries()
+        total = sum(size for _, size in entries.values())
+
+        for key in sorted(entries, key=lambda k: entries[k][0]):
+            if total <= self.max_bytes:
+                break
+            try:
+                shutil.rmtree(self._entry_path(key))
+            except OSError:
+                # Still memory-mapped somewhere (Windows); try again next time
+                continue
+            total -= entries[key][1]
+            self.evictions += 1
+
+    def clear(self) -> None:
+        for key in self._entries():
+            shutil.rmtree(self._entry_path(key), ignore_errors=True)
+
+    def stats(self) -> dict:
+        entries = self._entries()
+        return {
+            "directory": self.directory,
+            "entries": len(entries),
+            "total_bytes": sum(size for _, size in entries.values()),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def _env_directory() -> str:
+    directory = os.environ.get(CACHE_DIR_ENV, "").strip()
+    return directory if directory and directory.lower() not in _DISABLED else DEFAULT_CACHE_DIR
+
+
+def _env_max_mb() -> float:
+    return float(os.environ.get(CACHE_SIZE_ENV) or DEFAULT_MAX_BYTES / 1024 ** 2)
+
+
+def cache_from_environment() -> Optional[SpectrumCache]:
+    if os.environ.get(CACHE_DIR_ENV, "").strip().lower() in _DISABLED:
+        return None
+    return SpectrumCache(_env_directory(), int(_env_max_mb() * 1024 ** 2))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or manage the FD-Editor spectrum cache")
+    parser.add_argument("command", choices=["stats", "clear", "evict"])
+    parser.add_argument("--dir", default=_env_directory())
+    parser.add_argument("--max-mb", type=float, default=_env_max_mb())
+    args = parser.parse_args(argv)
+
+    cache = SpectrumCache(args.dir, int(args.max_mb * 1024 ** 2))
+    if args.command == "clear":
+        cache.clear()
+    elif args.command == "evict":
+        cache.evict()
+
+    stats = cache.stats()
+    print(f"Directory:   {stats['directory']}")
+    print(f"Entries:     {stats['entries']}")
+    print(f"Size:        {stats['total_bytes'] / 1024 ** 2:.1f} MB "
+          f"of {stats['max_bytes'] / 1024 ** 2:.1f} MB")
+    if args.command == "evict":
+        print(f"Evicted:     {stats['evictions']}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,314 @@
+import glob
+import os
+import queue
+import threading
+import time
+import numpy as np
+import cv2
+from PIL import Image
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+from .fft_engine import FFTEngine
+from .mask_manager import MaskManager
+from utils.image_utils import HIGH_BIT_MODES, decode_grayscale
+
+
+SEQUENCE_EXTENSIONS = (".tif", ".tiff", ".png", ".bmp", ".jpg")
+
+_END = object()
+
+
+def video_frames(filepath: str) -> Iterator[np.ndarray]:
+    capture = cv2.VideoCapture(filepath)
+    if not capture.isOpened():
+        raise IOError(f"Cannot open video: {filepath}")
+    try:
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            if frame.ndim == 3:
+                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            yield frame
+    finally:
+        capture.release()
+
+
+def image_sequence_paths(pattern: str) -> List[str]:
+    if os.path.isdir(pattern):
+        paths = [os.path.join(pattern, name) for name in os.listdir(pattern)
+                 if name.lower().endswith(SEQUENCE_EXTENSIONS)]
+    else:
+        paths = glob.glob(pattern)
+    return sorted(paths)
+
+
+def image_sequence_frames(pattern: str) -> Iterator[np.ndarray]:
+    # Frames stay in their decoded sample type; the reader converts them straight into its slot buffers
+    for path in image_sequence_paths(pattern):
+        yield decode_grayscale(path)
+
+
+def _is_sequence(source: str) -> bool:
+    return os.path.isdir(source) or glob.has_magic(source)
+
+
+def open_frame_source(source: str) -> Iterator[np.ndarray]:
+    if _is_sequence(source):
+        return image_sequence_frames(source)
+    return video_frames(source)
+
+
+def source_shape(source: str) -> Optional[Tuple[int, int]]:
+    # Taken from the headers so no frame has to be decoded and held just to size the buffers
+    if _is_sequence(source):
+        paths = image_sequence_paths(source)
+        if not paths:
+            return None
+        with Image.open(paths[0]) as img:
+            return img.height, img.width
+    
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise IOError(f"Cannot open video: {source}")
+    try:
+        h = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        w = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+    finally:
+        capture.release()
+    return (h, w) if h and w else None
+
+
+def source_bit_depth(source: str) -> int:
+    # Videos decode to 8 bits; sequences are judged by their first image
+    if _is_sequence(source):
+        paths = image_sequence_paths(source)
+        if paths:
+            with Image.open(paths[0]) as img:
+                if img.mode in HIGH_BIT_MODES:
+                    return 16
+    return 8
+
+
+class _Quantizer:
+    def __init__(self, bit_depth: int):
+        if bit_depth not in (8, 16):
+            raise ValueError(f"Unsupported bit depth: {bit_depth}")
+        self.dtype = np.uint8 if bit_depth == 8 else np.uint16
+        self.max_value = np.iinfo(self.dtype).max
+        self._scratch = None
+        self._frame = None
+
+    def __call__(self, frame: np.ndarray) -> np.ndarray:
+        if self._frame is None or self._frame.shape != frame.shape:
+            self._scratch = np.empty(frame.shape, dtype=np.float64)
+            self._frame = np.empty(frame.shape, dtype=self.dtype)
+        # Round rather than truncate so frames match apply_mask + rint
+        np.clip(frame, 0, self.max_value, out=self._scratch)
+        np.rint(self._scratch, out=self._frame, casting='unsafe')
+        return self._frame
+
+
+class ImageSequenceWriter:
+    def __init__(self, directory: str, prefix: str = "frame_", extension: str = ".tif", bit_depth: int = 8):
+        if bit_depth == 16 and extension.lower() not in (".tif", ".tiff", ".png"):
+            raise ValueError(f"16-bit frames cannot be written as {extension}")
+        self.directory = directory
+        self.prefix = prefix
+        self.extension = extension
+        self.bit_depth = bit_depth
+        self._quantize = _Quantizer(bit_depth)
+        os.makedirs(directory, exist_ok=True)
+
+    def __call__(self, index: int, frame: np.ndarray) -> None:
+        path = os.path.join(self.directory, f"{self.prefix}{index:06d}{self.extension}")
+        if not cv2.imwrite(path, self._quantize(frame)):
+            raise IOError(f"Could not write {path}")
+
+    def close(self) -> None:
+        pass
+
+
+class VideoFileWriter:
+    def __init__(self, filepath: str, fps: float = 25.0, fourcc: str = "mp4v"):
+        self.filepath = filepath
+        self.fps = fps
+        self.fourcc = fourcc
+        self._writer = None
+        self._quantize = _Quantizer(8)
+
+    def __call__(self, index: int, frame: np.ndarray) -> None:
+        if self._writer is None:
+            h, w = frame.shape
+            self._writer = cv2.VideoWriter(self.filepath, cv2.VideoWriter_fourcc(*self.fourcc),
+                                           self.fps, (w, h), False)
+        self._writer.write(self._quantize(frame))
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
+
+
+class StreamStats:
+    def __init__(self, frames: int = 0, elapsed: float = 0.0, compute_time: float = 0.0):
+        self.frames = frames
+        self.elapsed = elapsed
+        self.compute_time = compute_time
+
+    @property
+    def fps(self) -> float:
+        return self.frames / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __repr__(self) -> str:
+        return (f"StreamStats(frames={self.frames}, elapsed={self.elapsed:.3f}s, "
+                f"fps={self.fps:.1f}, compute={self.compute_time:.3f}s)")
+
+
+class StreamProcessor:
+    # Per in-flight frame: one float64 input buffer and one float64 output buffer
+    SLOT_BYTES_PER_PIXEL = 16
+    # fft2/ifft2 transform one axis at a time, so up to three complex128 arrays are alive at once
+    TRANSFORM_BYTES_PER_PIXEL = 3 * 16
+    # The frame being decoded: a 32-bit image plus its array copy, or a BGR video frame plus its gray copy
+    READ_BYTES_PER_PIXEL = 8
+    # The writer's float64 rounding scratch plus its uint8/uint16 frame
+    WRITE_BYTES_PER_PIXEL = 8 + 2
+    # Fixed: the shifted combined mask plus the above. OpenCV's and Pillow's codec buffers are not counted
+    FIXED_BYTES_PER_PIXEL = 8 + TRANSFORM_BYTES_PER_PIXEL + READ_BYTES_PER_PIXEL + WRITE_BYTES_PER_PIXEL
+
+    def __init__(self, mask_manager: MaskManager, shape: Tuple[int, int], prefetch: int = 4,
+                 memory_limit: int = 256 * 1024 ** 2, engine: FFTEngine = None):
+        # Frames are transformed at their native size and masks go to the plain spectrum, as in
+        # FFTEngine.apply_mask, so a window only changes the display and is fine; padding is not
+        if engine is not None and engine.padding is not None:
+            raise ValueError("Streaming transforms frames at their native size; padded engines are not supported")
+        self.shape = tuple(shape)
+        pixels = self.shape[0] * self.shape[1]
+
+        budget = memory_limit - self.FIXED_BYTES_PER_PIXEL * pixels
+        max_depth = budget // (self.SLOT_BYTES_PER_PIXEL * pixels)
+        if max_depth < 1:
+            raise ValueError(f"Memory limit of {memory_limit} bytes is too small for "
+                             f"{self.shape[1]}×{self.shape[0]} frames")
+        self.depth = int(min(prefetch, max_depth))
+
+        # Precompute the combined mask once, already in unshifted FFT order. Composite and shifted copy
+        # briefly coexist, which the transform temporaries more than cover since no slots exist yet
+        combined = mask_manager.get_combined_mask()
+        if combined is not None and combined.shape != self.shape:
+            raise ValueError(f"Mask shape {combined.shape} does not match frame shape {self.shape}")
+        self._mask = np.fft.ifftshift(combined) if combined is not None else None
+        del combined
+
+    def process_frame(self, frame: np.ndarray, out: np.ndarray) -> np.ndarray:
+        spectrum = np.fft.fft2(frame)
+        if self._mask is not None:
+            spectrum *= self._mask
+        np.copyto(out, np.fft.ifft2(spectrum).real)
+        return out
+
+    def run(self, frames: Iterable[np.ndarray], writer: Callable[[int, np.ndarray], None]) -> StreamStats:
+        free_inputs = queue.Queue()
+        free_outputs = queue.Queue()
+        for _ in range(self.depth):
+            free_inputs.put(np.empty(self.shape, dtype=np.float64))
+            free_outputs.put(np.empty(self.shape, dtype=np.float64))
+
+        pending = queue.Queue(maxsize=self.depth)
+        results = queue.Queue(maxsize=self.depth)
+        stop = threading.Event()
+        errors = []
+
+        def read_frames():
+            try:
+                for frame in frames:
+                    buffer = free_inputs.get()
+                    if stop.is_set():
+                        break
+                    if frame.shape != self.shape:
+                        raise ValueError(f"Frame shape {frame.shape} does not match {self.shape}")
+                    np.copyto(buffer, frame, casting='unsafe')
+                    # Release the decoded frame before the next one is decoded
+                    del frame
+                    pending.put(buffer)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                pending.put(_END)
+
+        def write_frames():
+            while True:
+                item = results.get()
+                if item is _END:
+                    break
+                index, buffer = item
+                try:
+                    if not errors:
+                        writer(index, buffer)
+                except Exception as e:
+                    errors.append(e)
+                    stop.set()
+                finally:
+                    free_outputs.put(buffer)
+
+        reader = threading.Thread(target=read_frames, name="stream-reader", daemon=True)
+        writer_thread = threading.Thread(target=write_frames, name="stream-writer", daemon=True)
+
+        stats = StreamStats()
+        start = time.perf_counter()
+        reader.start()
+        writer_thread.start()
+        try:
+            while not stop.is_set():
+                buffer = pending.get()
+                if buffer is _END:
+                    break
+                out = free_outputs.get()
+
+                compute_start = time.perf_counter()
+                self.process_frame(buffer, out)
+                stats.compute_time += time.perf_counter() - compute_start
+
+                free_inputs.put(buffer)
+                results.put((stats.frames, out))
+                stats.frames += 1
+        finally:
+            stop.set()
+            # Wake the reader if it is waiting for a free buffer
+            free_inputs.put(np.empty(0))
+            while reader.is_alive():
+                try:
+                    pending.get(timeout=0.05)
+                except queue.Empty:
+                    pass
+            results.put(_END)
+            writer_thread.join()
+
+        stats.elapsed = time.perf_counter() - start
+        if errors:
+            raise errors[0]
+        return stats
+
+
+def process_stream(source: str, mask_manager: MaskManager, output: str, fps: float = 25.0,
+                   prefetch: int = 4, memory_limit: int = 256 * 1024 ** 2, engine: FFTEngine = None) -> StreamStats:
+    bit_depth = source_bit_depth(source)
+    is_video = bool(os.path.splitext(output)[1])
+    if is_video and bit_depth > 8:
+        raise ValueError(f"{source} has {bit_depth}-bit frames; write them to an image sequence "
+                         f"directory instead of a video file")
+
+    shape = source_shape(source)
+    if shape is None:
+        return StreamStats()
+
+    processor = StreamProcessor(mask_manager, shape, prefetch, memory_limit, engine)
+    if is_video:
+        writer = VideoFileWriter(output, fps)
+    else:
+        writer = ImageSequenceWriter(output, bit_depth=bit_depth)
+
+    try:
+        return processor.run(open_frame_source(source), writer)
+    finally:
+        writer.close()
@@ -0,0 +1,377 @@
+import argparse
+import asyncio
+import json
+import socket
+import struct
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from core.fft_engine import FFTEngine
+from core.mask import Mask, MaskMode, mask_from_dict, mask_to_dict, validate_mask_dict
+from core.mask_manager import MaskManager
+from core.spectrum_cache import image_key
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+_LENGTH = struct.Struct("!I")
+
+# Planes stored per shared spectrum: amplitude, phase, original image
+_PLANES = 3
+
+
+def _attach(name: str, shape: Tuple[int, int], planes: int):
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray((planes,) + tuple(shape), dtype=np.float64, buffer=shm.buf)
+
+
+def _compute_spectrum(image_name: str, spectrum_name: str, shape: Tuple[int, int]) -> None:
+    image_shm, image = _attach(image_name, shape, 1)
+    spectrum_shm, planes = _attach(spectrum_name, shape, _PLANES)
+    engine = FFTEngine()
+    try:
+        engine.compute_fft(image[0])
+        planes[0] = engine.amplitude
+        planes[1] = engine.phase
+        planes[2] = image[0]
+    finally:
+        # Views must be dropped before the segments can be closed
+        del image, planes, engine
+        image_shm.close()
+        spectrum_shm.close()
+
+
+def _render_batch(spectrum_name: str, shape: Tuple[int, int], stacks: List[Tuple[Optional[str], List[dict]]]) -> List[np.ndarray]:
+    spectrum_shm, planes = _attach(spectrum_name, shape, _PLANES)
+    engine = FFTEngine()
+    try:
+        engine.amplitude, engine.phase, engine.original_image = planes
+
+        results = []
+        for mode, mask_dicts in stacks:
+            manager = MaskManager()
+            for data in mask_dicts:
+                manager.add_mask(mask_from_dict(data, shape))
+            if mode is not None:
+                # An explicit mode switches the whole stack, like the editor's mode buttons
+                manager.set_mode(MaskMode(mode))
+            results.append(np.array(engine.apply_mask(manager.get_combined_mask()), dtype=np.float64))
+        return results
+    finally:
+        del planes, engine
+        spectrum_shm.close()
+
+
+class SharedSpectrum:
+    def __init__(self, shape: Tuple[int, int]):
+        self.shape = tuple(shape)
+        nbytes = _PLANES * self.shape[0] * self.shape[1] * np.dtype(np.float64).itemsize
+        self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self.in_use = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def release(self) -> None:
+        self.shm.close()
+        self.shm.unlink()
+
+
+async def read_message(reader: asyncio.StreamReader) -> Tuple[dict, bytes]:
+    (length,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+    header = json.loads(await reader.readexactly(length))
+    payload = await reader.readexactly(header.get("nbytes", 0))
+    return header, payload
+
+
+def _frame(header: dict, payload) -> List:
+    payload = memoryview(payload).cast("B")
+    data = json.dumps(dict(header, nbytes=len(payload))).encode()
+    return [_LENGTH.pack(len(data)), data, payload]
+
+
+class RenderServer:
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, workers: int = None,
+                 max_spectra: int = 8, batch_window: float = 0.005):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.max_spectra = max_spectra
+        self.batch_window = batch_window
+        self._server = None
+        self._executor = None
+        self._spectra: "OrderedDict[str, SharedSpectrum]" = OrderedDict()
+        self._spectrum_tasks: Dict[str, asyncio.Task] = {}
+        self._pending: Dict[str, List] = {}
+        self.stats = defaultdict(int)
+
+    async def start(self) -> None:
+        self._executor = ProcessPoolExecutor(self.workers)
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        for spectrum in self._spectra.values():
+            spectrum.release()
+        self._spectra.clear()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    header, payload = await read_message(reader)
+                except asyncio.IncompleteReadError:
+                    break
+
+                try:
+                    response, body = await self._dispatch(header, payload)
+                except Exception as e:
+                    response, body = {"status": "error", "error": f"{type(e).__name__}: {e}"}, b""
+
+                writer.writelines(_frame(response, body))
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def _dispatch(self, header: dict, payload: bytes):
+        op = header.get("op")
+        self.stats["requests"] += 1
+
+        if op == "ping":
+            return {"status": "ok"}, b""
+
+        if op == "stats":
+            stats = dict(self.stats, cached_spectra=len(self._spectra))
+            return {"status": "ok", "stats": stats}, b""
+
+        if op == "put_image":
+            key = await self._ensure_spectrum(header, payload)
+            return {"status": "ok", "image_id": key}, b""
+
+        if op == "render":
+            if payload:
+                key = await self._ensure_spectrum(header, payload)
+            else:
+                key = header["image_id"]
+                if key in self._spectrum_tasks:
+                    await self._spectrum_tasks[key]
+                if key not in self._spectra:
+                    raise KeyError(f"Unknown image_id {key}")
+
+            # Reject malformed masks here so they cannot fail the other requests in the worker batch
+            shape = self._spectra[key].shape
+            mode = header.get("mode")
+            if mode is not None:
+                mode = MaskMode(mode).value
+            masks = [validate_mask_dict(data, shape) for data in header.get("masks", [])]
+            result = await self._submit_render(key, mode, masks)
+            response = {"status": "ok", "image_id": key, "shape": list(result.shape), "dtype": result.dtype.str}
+            return response, result
+
+        raise ValueError(f"Unknown op {op!r}")
+
+    async def _ensure_spectrum(self, header: dict, payload: bytes) -> str:
+        shape = tuple(header["shape"])
+        image = np.frombuffer(payload, dtype=np.dtype(header.get("dtype", "<f8"))).reshape(shape)
+        key = image_key(image, "numpy.fft")
+
+        if key in self._spectra:
+            self.stats["spectrum_hits"] += 1
+            self._spectra.move_to_end(key)
+            return key
+
+        # Concurrent requests for the same image share one computation
+        task = self._spectrum_tasks.get(key)
+        if task is None:
+            self.stats["spectrum_misses"] += 1
+            task = asyncio.ensure_future(self._compute_spectrum(key, image))
+            self._spectrum_tasks[key] = task
+        else:
+            self.stats["spectrum_hits"] += 1
+        await task
+        return key
+
+    async def _compute_spectrum(self, key: str, image: np.ndarray) -> None:
+        image_shm = shared_memory.SharedMemory(create=True, size=max(image.size, 1) * np.dtype(np.float64).itemsize)
+        spectrum = SharedSpectrum(image.shape)
+        try:
+            staged = np.ndarray(image.shape, dtype=np.float64, buffer=image_shm.buf)
+            staged[:] = image
+            del staged
+
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._executor, _compute_spectrum, image_shm.name, spectrum.name, image.shape)
+        except BaseException:
+            spectrum.release()
+            raise
+        finally:
+            image_shm.close()
+            image_shm.unlink()
+            self._spectrum_tasks.pop(key, None)
+
+        self._spectra[key] = spectrum
+        self._evict()
+
+    def _evict(self) -> None:
+        for key in list(self._spectra):
+            if len(self._spectra) <= self.max_spectra:
+                break
+            spectrum = self._spectra[key]
+            if spectrum.in_use or key in self._pending:
+                continue
+            del self._spectra[key]
+            spectrum.release()
+            self.stats["spectrum_evictions"] += 1
+
+    async def _submit_render(self, key: str, mode: Optional[str], masks: List[dict]) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        # Requests for the same image arriving within the batch window go to one worker call
+        batch = self._pending.setdefault(key, [])
+        batch.append(((mode, masks), future))
+        if len(batch) == 1:
+            loop.call_later(self.batch_window, self._flush, key)
+        return await future
+
+    def _flush(self, key: str) -> None:
+        batch = self._pending.pop(key, None)
+        if batch:
+            # Pin the spectrum now so it cannot be evicted before the batch runs
+            spectrum = self._spectra[key]
+            spectrum.in_use += 1
+            asyncio.ensure_future(self._run_batch(spectrum, batch))
+
+    async def _run_batch(self, spectrum: SharedSpectrum, batch: List) -> None:
+        self.stats["batches"] += 1
+        self.stats["renders"] += len(batch)
+        try:
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(self._executor, _render_batch, spectrum.name,
+                                                 spectrum.shape, [stack for stack, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            spectrum.in_use -= 1
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+        self._evict()
+
+
+class RenderError(Exception):
+    pass
+
+
+class RenderClient:
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, timeout: float = 60.0):
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+
+    def close(self) -> None:
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _recv_exactly(self, nbytes: int) -> bytearray:
+        buffer = bytearray(nbytes)
+        view = memoryview(buffer)
+        received = 0
+        while received < nbytes:
+            count = self._sock.recv_into(view[received:])
+            if count == 0:
+                raise ConnectionError("Render server closed the connection")
+            received += count
+        return buffer
+
+    def _request(self, header: dict, payload=b"") -> Tuple[dict, bytearray]:
+        for part in _frame(header, payload):
+            self._sock.sendall(part)
+
+        (length,) = _LENGTH.unpack(self._recv_exactly(_LENGTH.size))
+        response = json.loads(self._recv_exactly(length))
+        body = self._recv_exactly(response.get("nbytes", 0))
+        if response.get("status") != "ok":
+            raise RenderError(response.get("error", "Unknown error"))
+        return response, body
+
+    def ping(self) -> bool:
+        return self._request({"op": "ping"})[0]["status"] == "ok"
+
+    def stats(self) -> dict:
+        return self._request({"op": "stats"})[0]["stats"]
+
+    def put_image(self, image: np.ndarray) -> str:
+        image = np.ascontiguousarray(image, dtype=np.float64)
+        header = {"op": "put_image", "shape": list(image.shape), "dtype": image.dtype.str}
+        return self._request(header, image)[0]["image_id"]
+
+    def render(self, masks: List, image: np.ndarray = None, image_id: str = None,
+               mode: MaskMode = None) -> np.ndarray:
+        # Without a mode every mask keeps its own, so Remove and Highlight layers can be mixed
+        header = {
+            "op": "render",
+            "masks": [mask_to_dict(m) if isinstance(m, Mask) else m for m in masks],
+        }
+        if mode is not None:
+            header["mode"] = mode.value
+        payload = b""
+        if image is not None:
+            image = np.ascontiguousarray(image, dtype=np.float64)
+            header.update(shape=list(image.shape), dtype=image.dtype.str)
+            payload = image
+        elif image_id is not None:
+            header["image_id"] = image_id
+        else:
+            raise ValueError("render() needs an image or an image_id")
+
+        response, body = self._request(header, payload)
+        return np.frombuffer(body, dtype=np.dtype(response["dtype"])).reshape(response["shape"])
+
+
+async def _serve(args) -> None:
+    server = RenderServer(args.host, args.port, args.workers, args.max_spectra)
+    await server.start()
+    print(f"FD-Editor render server listening on {server.host}:{server.port}")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve FD-Editor reconstructions over a local socket")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-spectra", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+from PySide6.QtCore import QThread, Signal
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class BackgroundJob(QThread):
+    progress = Signal(int, str)
+    succeeded = Signal(object)
+    failed = Signal(str)
+    cancelled = Signal()
+
+    def __init__(self, func, parent=None):
+        super().__init__(parent)
+        self._func = func
+        self._cancel_requested = False
+
+    def cancel(self):
+        self._cancel_requested = True
+
+    def is_cancelled(self) -> bool:
+        return self._cancel_requested
+
+    def check_cancelled(self):
+        if self._cancel_requested:
+            raise JobCancelled()
+
+    def report(self, percent: int, message: str):
+        self.check_cancelled()
+        self.progress.emit(percent, message)
+
+    def run(self):
+        try:
+            result = self._func(self)
+        except JobCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            # A cancel that arrives after the work is done is too late; the result still counts
+            self.succeeded.emit(result)
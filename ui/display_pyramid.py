@@ -0,0 +1,69 @@
+import math
+import numpy as np
+from utils.image_utils import numpy_to_qimage
+
+
+class DisplayPyramid:
+    TILE_SIZE = 256
+    MIN_LEVEL_SIZE = 64
+
+    def __init__(self, array: np.ndarray):
+        self.levels = [np.ascontiguousarray(array, dtype=np.uint8)]
+        self._tiles = {}
+
+    @property
+    def height(self) -> int:
+        return self.levels[0].shape[0]
+
+    @property
+    def width(self) -> int:
+        return self.levels[0].shape[1]
+
+    @property
+    def max_level(self) -> int:
+        smallest = min(self.height, self.width)
+        return max(int(math.log2(max(smallest, 1) / self.MIN_LEVEL_SIZE)), 0)
+
+    def level_for_scale(self, scale: float) -> int:
+        # Largest power-of-two reduction that is still at least as detailed as the screen
+        if scale >= 1.0:
+            return 0
+        return min(int(math.floor(math.log2(1.0 / scale))), self.max_level)
+
+    def level(self, index: int) -> np.ndarray:
+        while len(self.levels) <= index:
+            src = self.levels[-1]
+            h, w = src.shape[0] // 2 * 2, src.shape[1] // 2 * 2
+            acc = src[0:h:2, 0:w:2].astype(np.uint16)
+            acc += src[1:h:2, 0:w:2]
+            acc += src[0:h:2, 1:w:2]
+            acc += src[1:h:2, 1:w:2]
+            acc += 2
+            acc >>= 2
+            self.levels.append(acc.astype(np.uint8))
+        return self.levels[index]
+
+    def tiles(self, index: int, x1: float, y1: float, x2: float, y2: float):
+        # Yields (x, y, w, h, qimage) in level-0 pixels for tiles overlapping the level-0 rect
+        level = self.level(index)
+        factor = 2 ** index
+        size = self.TILE_SIZE
+        lh, lw = level.shape
+
+        col1 = max(int(x1 // factor) // size, 0)
+        col2 = min(int(math.ceil(x2 / factor)) // size, (lw - 1) // size)
+        row1 = max(int(y1 // factor) // size, 0)
+        row2 = min(int(math.ceil(y2 / factor)) // size, (lh - 1) // size)
+
+        for row in range(row1, row2 + 1):
+            for col in range(col1, col2 + 1):
+                key = (index, row, col)
+                tile = self._tiles.get(key)
+                if tile is None:
+                    # Keep the buffer alive alongside the QImage that wraps it
+                    buffer = np.ascontiguousarray(level[row * size:(row + 1) * size, col * size:(col + 1) * size])
+                    tile = (numpy_to_qimage(buffer), buffer)
+                    self._tiles[key] = tile
+                qimage, buffer = tile
+                th, tw = buffer.shape
+                yield (col * size * factor, row * size * factor, tw * factor, th * factor, qimage)
@@ -1,21 +1,32 @@
 from PySide6.QtWidgets import QLabel
-from PySide6.QtGui import QPixmap, QPainter, QPen, QColor, QBrush, QImage
-from PySide6.QtCore import Qt, Signal, QPoint
+from PySide6.QtGui import QPainter, QPen, QColor, QBrush
+from PySide6.QtCore import Qt, Signal, QPoint, QPointF, QRectF
+import math
 import numpy as np
-from core.mask import MaskType, MaskMode
+from core.mask import MaskType, MaskMode, RADIAL_MASK_TYPES
+from .display_pyramid import DisplayPyramid
 
 
 class ImageCanvas(QLabel):
     mask_created = Signal(object)
+    mask_clicked = Signal(object)
     tool_selected = Signal()
     
+    HIT_TOLERANCE_PX = 4
+    MIN_ZOOM = 1.0
+    MAX_ZOOM = 64.0
+    ZOOM_STEP = 1.25
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setMinimumSize(400, 400)
         self.setAlignment(Qt.AlignCenter)
         self.setStyleSheet("border: 2px solid #aaa; background-color: #f5f5f5;")
         
-        self.pixmap_data = None
+        self.pyramid = None
+        self.zoom = 1.0
+        self.view_center = None
+        self.pan_anchor = None
         self.current_tool = None
         self.is_drawing = False
         self.start_point = None
@@ -24,20 +35,62 @@ class ImageCanvas(QLabel):
         self.spectrum_shape = None
         self.stored_masks = []
         self.current_mode = MaskMode.REMOVE
+        self.mask_index = None
+        self.hover_mask = None
+        self.selected_mask = None
         
-        self.setMouseTracking(False)
+        self.setMouseTracking(True)
     
-    def set_image(self, qimage):
-        if qimage is not None:
-            self.pixmap_data = QPixmap.fromImage(qimage)
-            self.update()
+    def set_image(self, array: np.ndarray):
+        if array is None:
+            return
+        
+        previous = self.pyramid
+        self.pyramid = DisplayPyramid(array)
+        if previous is None or array.shape != (previous.height, previous.width):
+            self.reset_view()
+        self.update()
+    
+    def reset_view(self):
+        self.zoom = 1.0
+        self.view_center = None
+        self.update()
+    
+    def _view_transform(self):
+        h, w = self.pyramid.height, self.pyramid.width
+        scale = min(self.width() / w, self.height() / h) * self.zoom
+        cx, cy = self.view_center if self.view_center is not None else (w / 2, h / 2)
+        return scale, self.width() / 2 - cx * scale, self.height() / 2 - cy * scale
+    
+    def _clamp_view(self):
+        h, w = self.pyramid.height, self.pyramid.width
+        scale = self._view_transform()[0]
+        half_w = self.width() / (2 * scale)
+        half_h = self.height() / (2 * scale)
+        cx, cy = self.view_center if self.view_center is not None else (w / 2, h / 2)
+        cx = min(max(cx, min(half_w, w / 2)), max(w - half_w, w / 2))
+        cy = min(max(cy, min(half_h, h / 2)), max(h - half_h, h / 2))
+        self.view_center = (cx, cy)
+    
+    def _image_to_screen(self, x, y):
+        scale, offset_x, offset_y = self._view_transform()
+        return QPointF(x * scale + offset_x, y * scale + offset_y)
+    
+    def _pixel_to_screen(self, x, y):
+        # Mask coordinates address pixel centres
+        return self._image_to_screen(x + 0.5, y + 0.5)
+    
+    def _screen_to_image(self, x, y):
+        scale, offset_x, offset_y = self._view_transform()
+        return (x - offset_x) / scale, (y - offset_y) / scale
     
     def set_spectrum_shape(self, shape):
         self.spectrum_shape = shape
     
     def set_tool(self, tool_type):
         self.current_tool = tool_type
-        self.setMouseTracking(tool_type == MaskType.FREEDRAW)
+        self.setMouseTracking(tool_type in (None, MaskType.FREEDRAW))
+        self.hover_mask = None
         self.tool_selected.emit()
     
     def set_mode(self, mode: MaskMode):
@@ -46,36 +99,69 @@ class ImageCanvas(QLabel):
     
     def set_masks(self, masks):
         self.stored_masks = [m for m in masks if m.enabled]
+        if self.hover_mask is not None and self.hover_mask not in self.stored_masks:
+            self.hover_mask = None
+        if self.selected_mask is not None and self.selected_mask not in self.stored_masks:
+            self.selected_mask = None
+        self.update()
+    
+    def set_mask_index(self, index):
+        self.mask_index = index
+    
+    def set_selected_mask(self, mask):
+        self.selected_mask = mask
         self.update()
     
+    def _masks_to_draw(self, rect):
+        if self.mask_index is None:
+            return self.stored_masks
+        
+        # Cull overlays that do not intersect the repainted part of the viewport
+        x1, y1 = self._screen_to_image(rect.left(), rect.top())
+        x2, y2 = self._screen_to_image(rect.right() + 1, rect.bottom() + 1)
+        return [m for m in self.mask_index.query_rect(x1 - 1, y1 - 1, x2, y2) if m.enabled]
+    
+    def mask_at(self, pos):
+        if self.mask_index is None or self.pyramid is None or self.spectrum_shape is None:
+            return None
+        
+        x, y = self._screen_to_image(pos.x(), pos.y())
+        tolerance = self.HIT_TOLERANCE_PX / self._view_transform()[0]
+        # Rectangles are stored as pixel edges; the other masks as pixel-centre coordinates
+        reach = tolerance + 0.5
+        candidates = self.mask_index.query_rect(x - reach, y - reach, x + reach, y + reach)
+        for mask in reversed(candidates):
+            offset = 0.0 if mask.mask_type == MaskType.RECTANGLE else 0.5
+            if mask.enabled and mask.contains_point(x - offset, y - offset, tolerance):
+                return mask
+        return None
+    
     def paintEvent(self, event):
         super().paintEvent(event)
         
-        if self.pixmap_data is None:
+        if self.pyramid is None:
             return
         
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
+        scale, offset_x, offset_y = self._view_transform()
         
-        pixmap_scaled = self.pixmap_data.scaled(
-            self.size(), 
-            Qt.KeepAspectRatio, 
-            Qt.SmoothTransformation
-        )
+        # Only the tiles of the pyramid level matching the zoom that intersect the viewport are drawn
+        rect = event.rect()
+        x1, y1 = self._screen_to_image(rect.left(), rect.top())
+        x2, y2 = self._screen_to_image(rect.right() + 1, rect.bottom() + 1)
+        level = self.pyramid.level_for_scale(scale)
+        painter.setRenderHint(QPainter.SmoothPixmapTransform, scale < 1.0)
+        for tile_x, tile_y, tile_w, tile_h, tile in self.pyramid.tiles(level, x1, y1, x2, y2):
+            painter.drawImage(QRectF(tile_x * scale + offset_x, tile_y * scale + offset_y,
+                                     tile_w * scale, tile_h * scale), tile)
         
-        offset_x = (self.width() - pixmap_scaled.width()) // 2
-        offset_y = (self.height() - pixmap_scaled.height()) // 2
-        painter.drawPixmap(offset_x, offset_y, pixmap_scaled)
+        painter.setRenderHint(QPainter.Antialiasing)
         
         if self.spectrum_shape is None:
             return
         
-        h, w = self.spectrum_shape
-        scale_x = pixmap_scaled.width() / w
-        scale_y = pixmap_scaled.height() / h
-        
         # Draw stored masks
-        for mask in self.stored_masks:
+        for mask in self._masks_to_draw(event.rect()):
             if mask.display_geometry is None:
                 continue
             
@@ -84,26 +170,27 @@ class ImageCanvas(QLabel):
             else:
                 color = QColor(100, 255, 100, 100)
             
-            pen = QPen(color, 2, Qt.SolidLine)
+            pen_width = 2
+            if mask is self.selected_mask:
+                color = QColor(255, 200, 0, 200)
+                pen_width = 3
+            elif mask is self.hover_mask:
+                color.setAlpha(220)
+                pen_width = 3
+            
+            pen = QPen(color, pen_width, Qt.SolidLine)
             brush = QBrush(QColor(color.red(), color.green(), color.blue(), 40))
             painter.setPen(pen)
             painter.setBrush(brush)
             
             if mask.mask_type == MaskType.RECTANGLE:
                 x1, y1, x2, y2 = mask.display_geometry
-                screen_x1 = int(x1 * scale_x) + offset_x
-                screen_y1 = int(y1 * scale_y) + offset_y
-                screen_x2 = int(x2 * scale_x) + offset_x
-                screen_y2 = int(y2 * scale_y) + offset_y
-                painter.drawRect(screen_x1, screen_y1, screen_x2 - screen_x1, screen_y2 - screen_y1)
+                painter.drawRect(QRectF(self._image_to_screen(x1, y1), self._image_to_screen(x2, y2)))
             
             elif mask.mask_type == MaskType.CIRCLE:
                 cx, cy, radius = mask.display_geometry
-                screen_cx = int(cx * scale_x) + offset_x
-                screen_cy = int(cy * scale_y) + offset_y
-                screen_radius = int(radius * ((scale_x + scale_y) / 2))
-                painter.drawEllipse(screen_cx - screen_radius, screen_cy - screen_radius, 
-                                  screen_radius * 2, screen_radius * 2)
+                screen_radius = radius * scale
+                painter.drawEllipse(self._pixel_to_screen(cx, cy), screen_radius, screen_radius)
             
             elif mask.mask_type == MaskType.FREEDRAW:
                 points = mask.display_geometry
@@ -111,11 +198,14 @@ class ImageCanvas(QLabel):
                     for i in range(len(points) - 1):
                         y1, x1 = points[i]
                         y2, x2 = points[i + 1]
-                        screen_x1 = int(x1 * scale_x) + offset_x
-                        screen_y1 = int(y1 * scale_y) + offset_y
-                        screen_x2 = int(x2 * scale_x) + offset_x
-                        screen_y2 = int(y2 * scale_y) + offset_y
-                        painter.drawLine(screen_x1, screen_y1, screen_x2, screen_y2)
+                        painter.drawLine(self._pixel_to_screen(x1, y1), self._pixel_to_screen(x2, y2))
+            
+            elif mask.mask_type in RADIAL_MASK_TYPES:
+                cx, cy, radii = mask.display_geometry
+                center = self._pixel_to_screen(cx, cy)
+                painter.setBrush(Qt.NoBrush)
+                for radius in radii:
+                    painter.drawEllipse(center, radius * scale, radius * scale)
         
         # Draw current drawing overlay
         if self.is_drawing and self.start_point and self.current_point:
@@ -152,8 +242,43 @@ class ImageCanvas(QLabel):
             for i in range(len(self.freedraw_points) - 1):
                 painter.drawLine(self.freedraw_points[i], self.freedraw_points[i + 1])
     
+    def wheelEvent(self, event):
+        if self.pyramid is None:
+            return
+        
+        steps = event.angleDelta().y() / 120
+        if steps == 0:
+            return
+        
+        # Zoom about the cursor: the image point under it stays put
+        pos = event.position()
+        anchor_x, anchor_y = self._screen_to_image(pos.x(), pos.y())
+        self.zoom = min(max(self.zoom * self.ZOOM_STEP ** steps, self.MIN_ZOOM), self.MAX_ZOOM)
+        scale = self._view_transform()[0]
+        self.view_center = (anchor_x - (pos.x() - self.width() / 2) / scale,
+                            anchor_y - (pos.y() - self.height() / 2) / scale)
+        self._clamp_view()
+        self.update()
+    
+    def mouseDoubleClickEvent(self, event):
+        if event.button() in (Qt.MiddleButton, Qt.RightButton):
+            self.reset_view()
+        else:
+            super().mouseDoubleClickEvent(event)
+    
     def mousePressEvent(self, event):
-        if self.current_tool is None or self.pixmap_data is None:
+        if self.pyramid is None:
+            return
+        
+        if event.button() in (Qt.MiddleButton, Qt.RightButton):
+            self._clamp_view()
+            self.pan_anchor = (event.pos(), self.view_center)
+            return
+        
+        if self.current_tool is None:
+            mask = self.mask_at(event.pos())
+            if mask is not None:
+                self.mask_clicked.emit(mask)
             return
         
         self.is_drawing = True
@@ -163,7 +288,21 @@ class ImageCanvas(QLabel):
             self.freedraw_points = [event.pos()]
     
     def mouseMoveEvent(self, event):
+        if self.pan_anchor is not None:
+            start, (cx, cy) = self.pan_anchor
+            scale = self._view_transform()[0]
+            self.view_center = (cx - (event.pos().x() - start.x()) / scale,
+                                cy - (event.pos().y() - start.y()) / scale)
+            self._clamp_view()
+            self.update()
+            return
+        
         if not self.is_drawing:
+            if self.current_tool is None:
+                hover = self.mask_at(event.pos())
+                if hover is not self.hover_mask:
+                    self.hover_mask = hover
+                    self.update()
             return
         
         self.current_point = event.pos()
@@ -174,6 +313,10 @@ class ImageCanvas(QLabel):
         self.update()
     
     def mouseReleaseEvent(self, event):
+        if self.pan_anchor is not None and event.button() in (Qt.MiddleButton, Qt.RightButton):
+            self.pan_anchor = None
+            return
+        
         if not self.is_drawing or self.current_tool is None:
             return
         
@@ -194,24 +337,14 @@ class ImageCanvas(QLabel):
         if self.spectrum_shape is None:
             return None
         
-        pixmap_scaled = self.pixmap_data.scaled(
-            self.size(), 
-            Qt.KeepAspectRatio, 
-            Qt.SmoothTransformation
-        )
-        
-        offset_x = (self.width() - pixmap_scaled.width()) // 2
-        offset_y = (self.height() - pixmap_scaled.height()) // 2
-        
         h, w = self.spectrum_shape
-        scale_x = w / pixmap_scaled.width()
-        scale_y = h / pixmap_scaled.height()
+        scale = self._view_transform()[0]
         
         if self.current_tool == MaskType.RECTANGLE:
-            x1 = int((self.start_point.x() - offset_x) * scale_x)
-            y1 = int((self.start_point.y() - offset_y) * scale_y)
-            x2 = int((self.current_point.x() - offset_x) * scale_x)
-            y2 = int((self.current_point.y() - offset_y) * scale_y)
+            # Rectangle corners snap to the nearest pixel edge
+            u1, v1 = self._screen_to_image(self.start_point.x(), self.start_point.y())
+            u2, v2 = self._screen_to_image(self.current_point.x(), self.current_point.y())
+            x1, y1, x2, y2 = int(round(u1)), int(round(v1)), int(round(u2)), int(round(v2))
             
             x1 = max(0, min(x1, w))
             x2 = max(0, min(x2, w))
@@ -221,20 +354,21 @@ class ImageCanvas(QLabel):
             return (x1, y1, x2, y2)
         
         elif self.current_tool == MaskType.CIRCLE:
-            cx = int((self.start_point.x() - offset_x) * scale_x)
-            cy = int((self.start_point.y() - offset_y) * scale_y)
+            # Circles keep sub-pixel centre and radius
+            u, v = self._screen_to_image(self.start_point.x(), self.start_point.y())
+            cx, cy = u - 0.5, v - 0.5
             
-            dx = (self.current_point.x() - self.start_point.x()) * scale_x
-            dy = (self.current_point.y() - self.start_point.y()) * scale_y
-            radius = int((dx**2 + dy**2)**0.5)
+            dx = (self.current_point.x() - self.start_point.x()) / scale
+            dy = (self.current_point.y() - self.start_point.y()) / scale
+            radius = (dx**2 + dy**2)**0.5
             
             return (cx, cy, radius)
         
         elif self.current_tool == MaskType.FREEDRAW:
             points = []
             for point in self.freedraw_points:
-                x = int((point.x() - offset_x) * scale_x)
-                y = int((point.y() - offset_y) * scale_y)
+                u, v = self._screen_to_image(point.x(), point.y())
+                x, y = math.floor(u), math.floor(v)
                 if 0 <= x < w and 0 <= y < h:
                     points.append((y, x))
             return points if points else None
@@ -1,13 +1,28 @@
+import numpy as np
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                                QPushButton, QFileDialog, QSlider, QLabel, 
-                               QButtonGroup, QGroupBox, QRadioButton)
+                               QButtonGroup, QGroupBox, QRadioButton, QComboBox,
+                               QDoubleSpinBox, QSpinBox, QFormLayout, QProgressBar)
 from PySide6.QtCore import Qt
 from .image_canvas import ImageCanvas
 from .mask_list_panel import MaskListPanel
-from core.fft_engine import FFTEngine
+from .background_job import BackgroundJob
+from .update_scheduler import UpdateScheduler
+from core.fft_engine import FFTEngine, PAD_ZERO, PAD_MIRROR, WINDOW_HANN, WINDOW_TUKEY, WINDOW_KAISER
+from core.spectrum_cache import cache_from_environment
 from core.mask_manager import MaskManager
-from core.mask import MaskType, MaskMode, Mask
-from utils.image_utils import load_image_as_grayscale, numpy_to_qimage, normalize_for_display
+from core.mask import MaskType, MaskMode, Mask, RadialFilterMask, FilterProfile, RADIAL_MASK_TYPES, remap_mask
+from utils.image_utils import load_image_as_grayscale, normalize_for_display, export_image, ExportFormat
+
+
+SAVE_FILTERS = {
+    "PNG (*.png)": ExportFormat.DISPLAY_8BIT,
+    "JPEG (*.jpg)": ExportFormat.DISPLAY_8BIT,
+    "BMP (*.bmp)": ExportFormat.DISPLAY_8BIT,
+    "16-bit TIFF (*.tif)": ExportFormat.TIFF_16BIT,
+    "32-bit float TIFF (*.tif)": ExportFormat.TIFF_FLOAT32,
+    "NumPy array (*.npy)": ExportFormat.NPY,
+}
 
 
 class MainWindow(QMainWindow):
@@ -16,12 +31,25 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("Fourier Domain Image Editor")
         self.setGeometry(100, 100, 1400, 800)
         
-        self.fft_engine = FFTEngine()
+        self.fft_engine = FFTEngine(cache=self._create_spectrum_cache())
         self.mask_manager = MaskManager()
         self.current_tool = None
+        self.current_job = None
+        # Radial filter the filter controls edit live; only set by selecting a filter
+        self.edited_filter = None
+        self._reconstruction = None
+        self._reconstruction_key = None
+        self._combined_buffer = None
+        self.update_scheduler = UpdateScheduler(self.refresh_views, parent=self)
         
         self.init_ui()
     
+    def _create_spectrum_cache(self):
+        try:
+            return cache_from_environment()
+        except (OSError, ValueError):
+            return None
+    
     def init_ui(self):
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -59,6 +87,29 @@ class MainWindow(QMainWindow):
         file_group.setLayout(file_layout)
         layout.addWidget(file_group)
         
+        # FFT Options Group
+        fft_group = QGroupBox("FFT Options")
+        fft_layout = QFormLayout()
+        
+        self.padding_combo = QComboBox()
+        self.padding_combo.addItem("Native size", None)
+        self.padding_combo.addItem("Zero pad (fast size)", PAD_ZERO)
+        self.padding_combo.addItem("Mirror pad (fast size)", PAD_MIRROR)
+        self.padding_combo.currentIndexChanged.connect(self.on_fft_options_changed)
+        fft_layout.addRow("Padding", self.padding_combo)
+        
+        self.window_combo = QComboBox()
+        self.window_combo.addItem("None", None)
+        self.window_combo.addItem("Hann", WINDOW_HANN)
+        self.window_combo.addItem("Tukey (α=0.5)", WINDOW_TUKEY)
+        self.window_combo.addItem("Kaiser (β=6)", WINDOW_KAISER)
+        self.window_combo.setToolTip("Taper the image edges before the FFT to suppress the edge cross artifact")
+        self.window_combo.currentIndexChanged.connect(self.on_fft_options_changed)
+        fft_layout.addRow("Apodization", self.window_combo)
+        
+        fft_group.setLayout(fft_layout)
+        layout.addWidget(fft_group)
+        
         # Mode Selection Group
         mode_group = QGroupBox("Edit Mode")
         mode_layout = QVBoxLayout()
@@ -112,11 +163,61 @@ class MainWindow(QMainWindow):
         self.tool_button_group.addButton(self.freedraw_tool_btn, 2)
         tools_layout.addWidget(self.freedraw_tool_btn)
         
+        self.select_tool_btn = QPushButton("🖱️ Select")
+        self.select_tool_btn.setCheckable(True)
+        self.select_tool_btn.setMinimumHeight(35)
+        self.tool_button_group.addButton(self.select_tool_btn, 3)
+        tools_layout.addWidget(self.select_tool_btn)
+        
         self.tool_button_group.buttonClicked.connect(self.on_tool_selected)
         
         tools_group.setLayout(tools_layout)
         layout.addWidget(tools_group)
         
+        # Frequency Filters Group
+        filter_group = QGroupBox("Frequency Filters")
+        filter_layout = QFormLayout()
+        
+        self.filter_type_combo = QComboBox()
+        for mask_type in RADIAL_MASK_TYPES:
+            self.filter_type_combo.addItem(mask_type.value, mask_type)
+        filter_layout.addRow("Type", self.filter_type_combo)
+        
+        self.filter_profile_combo = QComboBox()
+        for profile in FilterProfile:
+            self.filter_profile_combo.addItem(profile.value, profile)
+        self.filter_profile_combo.setCurrentIndex(2)
+        filter_layout.addRow("Profile", self.filter_profile_combo)
+        
+        self.filter_cutoff_spin = QDoubleSpinBox()
+        self.filter_cutoff_spin.setRange(0.0, 4096.0)
+        self.filter_cutoff_spin.setValue(30.0)
+        filter_layout.addRow("Cutoff", self.filter_cutoff_spin)
+        
+        self.filter_width_spin = QDoubleSpinBox()
+        self.filter_width_spin.setRange(0.5, 4096.0)
+        self.filter_width_spin.setValue(10.0)
+        filter_layout.addRow("Band width", self.filter_width_spin)
+        
+        self.filter_order_spin = QSpinBox()
+        self.filter_order_spin.setRange(1, 10)
+        self.filter_order_spin.setValue(2)
+        filter_layout.addRow("Order", self.filter_order_spin)
+        
+        self.add_filter_button = QPushButton("➕ Add Filter")
+        self.add_filter_button.setMinimumHeight(35)
+        self.add_filter_button.clicked.connect(self.add_filter_mask)
+        filter_layout.addRow(self.add_filter_button)
+        
+        self.filter_type_combo.currentIndexChanged.connect(self.on_filter_params_changed)
+        self.filter_profile_combo.currentIndexChanged.connect(self.on_filter_params_changed)
+        self.filter_cutoff_spin.valueChanged.connect(self.on_filter_params_changed)
+        self.filter_width_spin.valueChanged.connect(self.on_filter_params_changed)
+        self.filter_order_spin.valueChanged.connect(self.on_filter_params_changed)
+        
+        filter_group.setLayout(filter_layout)
+        layout.addWidget(filter_group)
+        
         # Intensity Control Group (only for Remove mode)
         self.intensity_group = QGroupBox("Mask Intensity")
         intensity_layout = QVBoxLayout()
@@ -175,6 +276,20 @@ class MainWindow(QMainWindow):
         self.status_label.setStyleSheet("color: #666; font-size: 11px;")
         status_layout.addWidget(self.status_label)
         
+        job_layout = QHBoxLayout()
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        job_layout.addWidget(self.progress_bar)
+        
+        self.cancel_button = QPushButton("✕")
+        self.cancel_button.setMaximumWidth(30)
+        self.cancel_button.setToolTip("Cancel")
+        self.cancel_button.clicked.connect(self.cancel_job)
+        job_layout.addWidget(self.cancel_button)
+        status_layout.addLayout(job_layout)
+        self.progress_bar.hide()
+        self.cancel_button.hide()
+        
         status_group.setLayout(status_layout)
         layout.addWidget(status_group)
         
@@ -215,6 +330,8 @@ class MainWindow(QMainWindow):
         self.freq_canvas.setMinimumSize(450, 450)
         self.freq_canvas.tool_selected.connect(self.enable_interaction)
         self.freq_canvas.mask_created.connect(self.on_mask_created)
+        self.freq_canvas.mask_clicked.connect(self.on_canvas_mask_clicked)
+        self.freq_canvas.set_mask_index(self.mask_manager.index)
         freq_container.addWidget(self.freq_canvas)
         
         image_layout.addLayout(spatial_container)
@@ -237,6 +354,61 @@ class MainWindow(QMainWindow):
         panel.setMaximumWidth(250)
         return panel
     
+    def start_job(self, func, on_success, description):
+        if self.current_job is not None:
+            return
+        
+        job = BackgroundJob(func, self)
+        job.progress.connect(self.on_job_progress)
+        job.succeeded.connect(on_success)
+        job.failed.connect(lambda message: self.status_label.setText(f"Error {description}: {message}"))
+        job.cancelled.connect(lambda: self.status_label.setText(f"{description.capitalize()} cancelled"))
+        job.finished.connect(self.on_job_finished)
+        
+        self.current_job = job
+        self.load_button.setEnabled(False)
+        self.save_button.setEnabled(False)
+        self.padding_combo.setEnabled(False)
+        self.window_combo.setEnabled(False)
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.cancel_button.show()
+        job.start()
+    
+    def on_job_progress(self, percent, message):
+        self.progress_bar.setValue(percent)
+        self.status_label.setText(message)
+    
+    def on_job_finished(self):
+        self.current_job.deleteLater()
+        self.current_job = None
+        self.progress_bar.hide()
+        self.cancel_button.hide()
+        self.load_button.setEnabled(True)
+        self.save_button.setEnabled(self.fft_engine.original_image is not None)
+        self.padding_combo.setEnabled(True)
+        self.window_combo.setEnabled(True)
+        self._sync_fft_options()
+    
+    def _sync_fft_options(self):
+        # A cancelled or failed recompute leaves the engine on its old settings
+        for combo, value in ((self.padding_combo, self.fft_engine.padding), (self.window_combo, self.fft_engine.window)):
+            combo.blockSignals(True)
+            combo.setCurrentIndex(max(combo.findData(value), 0))
+            combo.blockSignals(False)
+    
+    def cancel_job(self):
+        if self.current_job is not None:
+            self.current_job.cancel()
+            self.status_label.setText("Cancelling...")
+    
+    def closeEvent(self, event):
+        # The job thread is a child of the window and must not be destroyed while running
+        if self.current_job is not None:
+            self.current_job.cancel()
+            self.current_job.wait()
+        super().closeEvent(event)
+    
     def load_image(self):
         filepath, _ = QFileDialog.getOpenFileName(
             self, "Open Image", "", "Images (*.png *.jpg *.bmp *.tif *.tiff)"
@@ -244,68 +416,150 @@ class MainWindow(QMainWindow):
         if not filepath:
             return
         
-        try:
-            image = load_image_as_grayscale(filepath)
-            self.fft_engine.compute_fft(image)
-            
-            self.update_displays()
-            self.reset_button.setEnabled(True)
-            self.save_button.setEnabled(True)
-            
-            h, w = image.shape
-            self.status_label.setText(f"Image loaded: {w}×{h} pixels\nReady to create masks")
-            
-        except Exception as e:
-            self.status_label.setText(f"Error loading image: {str(e)}")
+        self.start_job(self._fft_job(filepath=filepath), self.on_image_loaded, "loading image")
+    
+    def on_fft_options_changed(self, *args):
+        if self.fft_engine.original_image is None:
+            return
+        self.start_job(self._fft_job(image=self.fft_engine.original_image), self.on_image_loaded, "computing FFT")
+    
+    def _fft_job(self, filepath=None, image=None):
+        engine = FFTEngine(cache=self.fft_engine.cache, padding=self.padding_combo.currentData(),
+                           window=self.window_combo.currentData())
+        
+        def run(job):
+            source = image
+            if source is None:
+                job.report(5, "Decoding image...")
+                source = load_image_as_grayscale(filepath)
+            job.report(30, "Computing FFT...")
+            engine.compute_fft(source)
+            job.report(80, "Preparing display...")
+            freq_img = normalize_for_display(engine.get_log_magnitude_spectrum())
+            spatial_img = normalize_for_display(engine.original_image)
+            job.report(100, "Done")
+            return engine, freq_img, spatial_img
+        
+        return run
+    
+    def on_image_loaded(self, result):
+        engine, freq_img, spatial_img = result
+        
+        old_engine = self.fft_engine
+        if old_engine.amplitude is not None and old_engine.amplitude.shape != engine.amplitude.shape:
+            if self.mask_manager.masks and old_engine.native_shape == engine.native_shape:
+                # Same image at a different padded size: carry the masks over
+                self._remap_masks(old_engine, engine)
+            else:
+                self.mask_manager.clear_all()
+                self.mask_list_panel.clear_masks()
+                self.clear_mask_button.setEnabled(False)
+                self.intensity_slider.setEnabled(False)
+        
+        self.fft_engine = engine
+        self._reconstruction_key = None
+        
+        # The spectrum image was already prepared by the load job
+        self.freq_canvas.set_image(freq_img)
+        self.freq_canvas.set_spectrum_shape(engine.amplitude.shape)
+        if self.mask_manager.masks:
+            self.update_displays(UpdateScheduler.SPATIAL | UpdateScheduler.MASKS)
+        else:
+            self.spatial_canvas.set_image(spatial_img)
+            self.freq_canvas.set_masks(self.mask_manager.masks)
+        self.reset_button.setEnabled(True)
+        
+        h, w = engine.original_image.shape
+        self.status_label.setText(f"Image loaded: {w}×{h} pixels\nReady to create masks")
+    
+    def _remap_masks(self, old_engine, new_engine):
+        def point_map(x, y):
+            return new_engine.native_to_padded(*old_engine.padded_to_native(x, y))
+        
+        masks = [remap_mask(m, new_engine.amplitude.shape, point_map) for m in self.mask_manager.masks]
+        self.mask_manager.clear_all()
+        self.mask_list_panel.clear_masks()
+        for mask in masks:
+            self.mask_manager.add_mask(mask)
+        self.mask_list_panel.add_masks(masks)
     
     def save_image(self):
         if self.fft_engine.original_image is None:
             return
         
-        filepath, _ = QFileDialog.getSaveFileName(
-            self, "Save Image", "", "PNG (*.png);;JPEG (*.jpg);;BMP (*.bmp)"
+        filepath, selected_filter = QFileDialog.getSaveFileName(
+            self, "Save Image", "", ";;".join(SAVE_FILTERS)
         )
         if not filepath:
             return
+        export_format = SAVE_FILTERS.get(selected_filter, ExportFormat.DISPLAY_8BIT)
         
-        try:
-            combined_mask = self.mask_manager.get_combined_mask()
-            if combined_mask is not None:
-                modified_amplitude = self.fft_engine.amplitude * combined_mask
-                reconstructed = self.fft_engine.reconstruct_image(modified_amplitude)
-            else:
-                reconstructed = self.fft_engine.original_image
-            
-            from PIL import Image
-            result_img = normalize_for_display(reconstructed)
-            Image.fromarray(result_img).save(filepath)
-            
-            self.status_label.setText(f"Image saved successfully")
-        except Exception as e:
-            self.status_label.setText(f"Error saving: {str(e)}")
-    
-    def update_displays(self):
-        combined_mask = self.mask_manager.get_combined_mask()
-        if combined_mask is not None:
-            modified_amplitude = self.fft_engine.amplitude * combined_mask
-            reconstructed = self.fft_engine.reconstruct_image(modified_amplitude)
-            spatial_img = normalize_for_display(reconstructed)
+        # Reuse the displayed reconstruction when the mask state hasn't changed since
+        engine = self.fft_engine
+        if self._reconstruction_key == self.mask_manager.state_key():
+            reconstructed = self._reconstruction
+            combined_mask = None
         else:
-            spatial_img = normalize_for_display(self.fft_engine.original_image)
+            reconstructed = None
+            combined_mask = self.mask_manager.get_combined_mask()
         
-        self.spatial_canvas.set_image(numpy_to_qimage(spatial_img))
+        def save(job):
+            result = reconstructed
+            if result is None:
+                job.report(10, "Reconstructing...")
+                result = engine.apply_mask(combined_mask)
+            job.report(70, f"Writing {export_format.value}...")
+            export_image(result, filepath, export_format)
+            return filepath
         
+        self.start_job(save, lambda path: self.status_label.setText("Image saved successfully"), "saving")
+    
+    def current_reconstruction(self):
+        key = self.mask_manager.state_key()
+        if self._reconstruction is None or self._reconstruction_key != key:
+            shape = self.fft_engine.amplitude.shape
+            if self._combined_buffer is None or self._combined_buffer.shape != shape:
+                self._combined_buffer = np.empty(shape, dtype=np.float64)
+            combined_mask = self.mask_manager.get_combined_mask(out=self._combined_buffer)
+            self._reconstruction = self.fft_engine.apply_mask(combined_mask)
+            self._reconstruction_key = key
+        return self._reconstruction
+    
+    def update_displays(self, changes=UpdateScheduler.ALL):
+        self.update_scheduler.request(changes)
+    
+    def refresh_views(self, changes):
+        if self.fft_engine.amplitude is None:
+            return
+        if changes & UpdateScheduler.SPATIAL:
+            self.update_spatial_view()
+        if changes & UpdateScheduler.SPECTRUM:
+            self.update_spectrum_view()
+        if changes & UpdateScheduler.MASKS:
+            self.update_mask_overlays()
+        
+        stats = self.update_scheduler.stats()
+        self.status_label.setToolTip(f"Renders: {stats['executed']} executed, {stats['skipped']} merged "
+                                     f"of {stats['requested']} requests")
+    
+    def update_spatial_view(self):
+        spatial_img = normalize_for_display(self.current_reconstruction())
+        self.spatial_canvas.set_image(spatial_img)
+    
+    def update_spectrum_view(self):
         log_spectrum = self.fft_engine.get_log_magnitude_spectrum()
         freq_img = normalize_for_display(log_spectrum)
-        self.freq_canvas.set_image(numpy_to_qimage(freq_img))
+        self.freq_canvas.set_image(freq_img)
         self.freq_canvas.set_spectrum_shape(self.fft_engine.amplitude.shape)
+    
+    def update_mask_overlays(self):
         self.freq_canvas.set_masks(self.mask_manager.masks)
     
     def reset_image(self):
         if self.fft_engine.original_image is not None:
             self.mask_manager.clear_all()
             self.mask_list_panel.clear_masks()
-            self.update_displays()
+            self.update_displays(UpdateScheduler.SPATIAL | UpdateScheduler.MASKS)
             self.status_label.setText("All masks cleared")
             self.clear_mask_button.setEnabled(False)
             self.intensity_slider.setEnabled(False)
@@ -322,10 +576,9 @@ class MainWindow(QMainWindow):
             self.intensity_group.setEnabled(False)
             self.status_label.setText("Mode: Highlight - Keep only selected frequencies")
         
-        for mask in self.mask_manager.masks:
-            self.mask_list_panel.update_mask_display(mask)
+        self.mask_list_panel.update_mask_display()
         
-        self.update_displays()
+        self.update_displays(UpdateScheduler.SPATIAL | UpdateScheduler.MASKS)
     
     def on_tool_selected(self, button):
         if button == self.rect_tool_btn:
@@ -334,13 +587,19 @@ class MainWindow(QMainWindow):
             self.current_tool = MaskType.CIRCLE
         elif button == self.freedraw_tool_btn:
             self.current_tool = MaskType.FREEDRAW
+        else:
+            self.current_tool = None
         
         self.freq_canvas.set_tool(self.current_tool)
+        if self.current_tool is None:
+            self.status_label.setText("Tool: Select\nClick a mask on the frequency domain")
+            return
+        
         mode_name = self.mask_manager.current_mode.value
         self.status_label.setText(f"Tool: {self.current_tool.value}\nMode: {mode_name}\nDraw on frequency domain")
     
     def enable_interaction(self):
-        if self.fft_engine.amplitude is not None:
+        if self.fft_engine.amplitude is not None and self.current_tool is not None:
             self.status_label.setText(f"Creating {self.current_tool.value} mask...")
     
     def on_mask_created(self, geometry):
@@ -349,11 +608,14 @@ class MainWindow(QMainWindow):
         
         mask = Mask(self.current_tool, self.fft_engine.amplitude.shape, self.mask_manager.current_mode)
         mask.set_geometry(geometry)
-        
+        self._add_mask(mask)
+    
+    def _add_mask(self, mask):
+        self.edited_filter = None
         self.mask_manager.add_mask(mask)
         self.mask_list_panel.add_mask(mask)
         
-        self.update_displays()
+        self.update_displays(UpdateScheduler.SPATIAL | UpdateScheduler.MASKS)
         self.clear_mask_button.setEnabled(True)
         
         if self.mask_manager.current_mode == MaskMode.REMOVE:
@@ -363,6 +625,35 @@ class MainWindow(QMainWindow):
         num_masks = len(self.mask_manager.masks)
         self.status_label.setText(f"Mask created! Total: {num_masks}")
     
+    def add_filter_mask(self):
+        if self.fft_engine.amplitude is None:
+            return
+        
+        mask = RadialFilterMask(
+            self.filter_type_combo.currentData(),
+            self.fft_engine.amplitude.shape,
+            self.mask_manager.current_mode,
+            profile=self.filter_profile_combo.currentData(),
+            cutoff=self.filter_cutoff_spin.value(),
+            width=self.filter_width_spin.value(),
+            order=self.filter_order_spin.value(),
+        )
+        self._add_mask(mask)
+    
+    def on_filter_params_changed(self, *args):
+        # Without an explicit selection the controls only configure the next Add Filter
+        current_mask = self.edited_filter
+        if current_mask is None or current_mask is not self.mask_manager.current_mask:
+            return
+        
+        current_mask.mask_type = self.filter_type_combo.currentData()
+        current_mask.profile = self.filter_profile_combo.currentData()
+        current_mask.order = self.filter_order_spin.value()
+        current_mask.set_geometry((self.filter_cutoff_spin.value(), self.filter_width_spin.value()))
+        self.mask_manager.refresh_mask(current_mask)
+        self.mask_list_panel.update_mask_display(current_mask)
+        self.update_displays(UpdateScheduler.SPATIAL | UpdateScheduler.MASKS)
+    
     def on_intensity_changed(self, value):
         current_mask = self.mask_manager.current_mask
         if current_mask is not None and current_mask.mode == MaskMode.REMOVE:
@@ -370,10 +661,15 @@ class MainWindow(QMainWindow):
             current_mask.set_intensity(intensity)
             
             self.intensity_label.setText(f"{value}%")
-            self.update_displays()
+            self.update_displays(UpdateScheduler.SPATIAL)
+    
+    def on_canvas_mask_clicked(self, mask):
+        self.mask_list_panel.select_mask(mask)
+        self.on_mask_list_selected(mask)
     
     def on_mask_list_selected(self, mask):
         self.mask_manager.current_mask = mask
+        self.freq_canvas.set_selected_mask(mask)
         
         if mask.mode == MaskMode.REMOVE:
             intensity_percent = int(mask.intensity * 100)
@@ -382,17 +678,38 @@ class MainWindow(QMainWindow):
         else:
             self.intensity_slider.setEnabled(False)
         
+        if isinstance(mask, RadialFilterMask):
+            self._show_filter_params(mask)
+            self.edited_filter = mask
+        else:
+            self.edited_filter = None
+        
         self.clear_mask_button.setEnabled(True)
         self.status_label.setText(f"Selected: {mask.mask_type.value} ({mask.mode.value})")
     
+    def _show_filter_params(self, mask):
+        controls = (self.filter_type_combo, self.filter_profile_combo, self.filter_cutoff_spin,
+                    self.filter_width_spin, self.filter_order_spin)
+        for control in controls:
+            control.blockSignals(True)
+        
+        self.filter_type_combo.setCurrentIndex(RADIAL_MASK_TYPES.index(mask.mask_type))
+        self.filter_profile_combo.setCurrentIndex(list(FilterProfile).index(mask.profile))
+        self.filter_cutoff_spin.setValue(mask.cutoff)
+        self.filter_width_spin.setValue(mask.width)
+        self.filter_order_spin.setValue(mask.order)
+        
+        for control in controls:
+            control.blockSignals(False)
+    
     def on_mask_toggled(self, mask, enabled):
         mask.enabled = enabled
-        self.update_displays()
+        self.update_displays(UpdateScheduler.SPATIAL | UpdateScheduler.MASKS)
     
     def on_mask_deleted(self, mask):
         self.mask_manager.remove_mask(mask)
         self.mask_list_panel.remove_mask(mask)
-        self.update_displays()
+        self.update_displays(UpdateScheduler.SPATIAL | UpdateScheduler.MASKS)
         
         if not self.mask_manager.masks:
             self.clear_mask_button.setEnabled(False)
@@ -1,6 +1,165 @@
-from PySide6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QListWidget, 
-                               QListWidgetItem, QHBoxLayout, QPushButton, QCheckBox)
-from PySide6.QtCore import Signal, Qt
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QListView, QStyle,
+                               QStyledItemDelegate, QStyleOptionButton, QApplication, QAbstractItemView)
+from PySide6.QtCore import Signal, Qt, QAbstractListModel, QModelIndex, QRect, QSize, QEvent
+from PySide6.QtGui import QColor, QFont
+
+
+def mask_label(mask):
+    mode_indicator = "🔴" if mask.mode.value == "Remove" else "🟢"
+    return f"{mode_indicator} {mask.mask_type.value}"
+
+
+class MaskListModel(QAbstractListModel):
+    MaskRole = Qt.UserRole + 1
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.masks = []
+        self._by_id = {}
+        # mask_id -> row; dropped on removal and rebuilt on the next lookup
+        self._rows = {}
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.masks)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self.masks):
+            return None
+        mask = self.masks[index.row()]
+        if role == Qt.DisplayRole:
+            return mask_label(mask)
+        if role == Qt.CheckStateRole:
+            return Qt.Checked if mask.enabled else Qt.Unchecked
+        if role == self.MaskRole:
+            return mask
+        return None
+    
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsUserCheckable
+    
+    def __contains__(self, mask):
+        return mask.mask_id in self._by_id
+    
+    def row_of(self, mask):
+        if mask.mask_id not in self._by_id:
+            return -1
+        if self._rows is None:
+            self._rows = {m.mask_id: row for row, m in enumerate(self.masks)}
+        return self._rows[mask.mask_id]
+    
+    def index_of(self, mask):
+        row = self.row_of(mask)
+        return self.index(row) if row >= 0 else QModelIndex()
+    
+    def mask_at(self, row):
+        return self.masks[row] if 0 <= row < len(self.masks) else None
+    
+    def add_masks(self, masks):
+        masks = [m for m in masks if m.mask_id not in self._by_id]
+        if not masks:
+            return
+        
+        first = len(self.masks)
+        self.beginInsertRows(QModelIndex(), first, first + len(masks) - 1)
+        self.masks.extend(masks)
+        for row, mask in enumerate(masks, first):
+            self._by_id[mask.mask_id] = mask
+            if self._rows is not None:
+                self._rows[mask.mask_id] = row
+        self.endInsertRows()
+    
+    def remove_masks(self, masks):
+        rows = sorted({self.row_of(m) for m in masks if m.mask_id in self._by_id})
+        if not rows:
+            return
+        
+        # Remove contiguous runs from the bottom up so earlier rows keep their positions
+        runs = []
+        for row in rows:
+            if runs and runs[-1][1] == row - 1:
+                runs[-1][1] = row
+            else:
+                runs.append([row, row])
+        
+        for first, last in reversed(runs):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            for mask in self.masks[first:last + 1]:
+                del self._by_id[mask.mask_id]
+            del self.masks[first:last + 1]
+            self.endRemoveRows()
+        self._rows = None
+    
+    def clear(self):
+        self.beginResetModel()
+        self.masks = []
+        self._by_id.clear()
+        self._rows = {}
+        self.endResetModel()
+    
+    def refresh(self, mask=None):
+        if mask is None:
+            if self.masks:
+                self.dataChanged.emit(self.index(0), self.index(len(self.masks) - 1))
+            return
+        index = self.index_of(mask)
+        if index.isValid():
+            self.dataChanged.emit(index, index)
+
+
+class MaskItemDelegate(QStyledItemDelegate):
+    CHECKBOX = "checkbox"
+    DELETE = "delete"
+    
+    ROW_HEIGHT = 28
+    MARGIN = 5
+    DELETE_WIDTH = 25
+    
+    def sizeHint(self, option, index):
+        return QSize(0, self.ROW_HEIGHT)
+    
+    def _check_rect(self, rect):
+        size = QApplication.style().pixelMetric(QStyle.PM_IndicatorWidth)
+        return QRect(rect.left() + self.MARGIN, rect.center().y() - size // 2, size, size)
+    
+    def _delete_rect(self, rect):
+        return QRect(rect.right() - self.MARGIN - self.DELETE_WIDTH, rect.top(), self.DELETE_WIDTH, rect.height())
+    
+    def paint(self, painter, option, index):
+        mask = index.data(MaskListModel.MaskRole)
+        if mask is None:
+            return
+        style = option.widget.style() if option.widget else QApplication.style()
+        
+        painter.save()
+        style.drawPrimitive(QStyle.PE_PanelItemViewItem, option, painter, option.widget)
+        
+        check = QStyleOptionButton()
+        check.rect = self._check_rect(option.rect)
+        check.state = QStyle.State_Enabled | (QStyle.State_On if mask.enabled else QStyle.State_Off)
+        style.drawPrimitive(QStyle.PE_IndicatorCheckBox, check, painter, option.widget)
+        
+        delete_rect = self._delete_rect(option.rect)
+        text_rect = QRect(check.rect.right() + 2 * self.MARGIN, option.rect.top(),
+                          delete_rect.left() - check.rect.right() - 3 * self.MARGIN, option.rect.height())
+        selected = option.state & QStyle.State_Selected
+        painter.setPen(option.palette.highlightedText().color() if selected else option.palette.text().color())
+        painter.drawText(text_rect, Qt.AlignVCenter | Qt.AlignLeft, mask_label(mask))
+        
+        font = QFont(option.font)
+        font.setBold(True)
+        painter.setFont(font)
+        painter.setPen(QColor("red"))
+        painter.drawText(delete_rect, Qt.AlignCenter, "✕")
+        painter.restore()
+    
+    def control_at(self, rect, pos):
+        if self._check_rect(rect).adjusted(-2, -2, 2, 2).contains(pos):
+            return self.CHECKBOX
+        if self._delete_rect(rect).contains(pos):
+            return self.DELETE
+        return None
 
 
 class MaskListPanel(QWidget):
@@ -10,8 +169,7 @@ class MaskListPanel(QWidget):
     
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.masks = []
-        self.item_widgets = {}
+        self.model = MaskListModel(self)
         
         layout = QVBoxLayout(self)
         layout.setSpacing(5)
@@ -21,72 +179,81 @@ class MaskListPanel(QWidget):
         title.setAlignment(Qt.AlignCenter)
         layout.addWidget(title)
         
-        self.list_widget = QListWidget()
-        self.list_widget.itemClicked.connect(self.on_item_clicked)
-        layout.addWidget(self.list_widget)
+        self.delegate = MaskItemDelegate(self)
+        
+        # Rows are painted by the delegate, so only visible rows cost anything
+        self.list_view = QListView()
+        self.list_view.setModel(self.model)
+        self.list_view.setItemDelegate(self.delegate)
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.list_view.clicked.connect(self.on_item_clicked)
+        self.list_view.installEventFilter(self)
+        self.list_view.viewport().installEventFilter(self)
+        layout.addWidget(self.list_view)
         
         info_label = QLabel("Click to select\nUncheck to disable")
         info_label.setStyleSheet("color: #666; font-size: 10px;")
         info_label.setAlignment(Qt.AlignCenter)
         layout.addWidget(info_label)
     
+    @property
+    def masks(self):
+        return self.model.masks
+    
     def add_mask(self, mask):
-        self.masks.append(mask)
-        
-        item = QListWidgetItem()
-        widget = self._create_mask_item_widget(mask)
-        item.setSizeHint(widget.sizeHint())
-        
-        self.list_widget.addItem(item)
-        self.list_widget.setItemWidget(item, widget)
-        
-        self.item_widgets[mask] = (item, widget)
+        self.model.add_masks([mask])
+    
+    def add_masks(self, masks):
+        self.model.add_masks(masks)
     
     def remove_mask(self, mask):
-        if mask in self.masks:
-            index = self.masks.index(mask)
-            self.masks.remove(mask)
-            self.list_widget.takeItem(index)
-            if mask in self.item_widgets:
-                del self.item_widgets[mask]
+        self.model.remove_masks([mask])
+    
+    def remove_masks(self, masks):
+        self.model.remove_masks(masks)
     
     def clear_masks(self):
-        self.masks.clear()
-        self.list_widget.clear()
-        self.item_widgets.clear()
-    
-    def update_mask_display(self, mask):
-        if mask in self.item_widgets:
-            item, old_widget = self.item_widgets[mask]
-            new_widget = self._create_mask_item_widget(mask)
-            self.list_widget.setItemWidget(item, new_widget)
-            self.item_widgets[mask] = (item, new_widget)
-    
-    def _create_mask_item_widget(self, mask):
-        widget = QWidget()
-        layout = QHBoxLayout(widget)
-        layout.setContentsMargins(5, 2, 5, 2)
-        
-        checkbox = QCheckBox()
-        checkbox.setChecked(mask.enabled)
-        checkbox.stateChanged.connect(lambda state: self.mask_toggled.emit(mask, state == Qt.Checked))
-        layout.addWidget(checkbox)
-        
-        mode_indicator = "🔴" if mask.mode.value == "Remove" else "🟢"
-        label = QLabel(f"{mode_indicator} {mask.mask_type.value}")
-        layout.addWidget(label)
-        
-        layout.addStretch()
-        
-        delete_btn = QPushButton("✕")
-        delete_btn.setMaximumWidth(25)
-        delete_btn.setStyleSheet("color: red; font-weight: bold;")
-        delete_btn.clicked.connect(lambda: self.mask_deleted.emit(mask))
-        layout.addWidget(delete_btn)
-        
-        return widget
+        self.model.clear()
+    
+    def select_mask(self, mask):
+        index = self.model.index_of(mask)
+        if index.isValid():
+            self.list_view.setCurrentIndex(index)
+            self.list_view.scrollTo(index)
+    
+    def update_mask_display(self, mask=None):
+        # No mask refreshes every row with a single dataChanged
+        self.model.refresh(mask)
+    
+    def eventFilter(self, obj, event):
+        if obj is self.list_view.viewport() and event.type() in (QEvent.MouseButtonPress, QEvent.MouseButtonRelease,
+                                                                 QEvent.MouseButtonDblClick):
+            # Clicks on a row's checkbox or delete button are handled here and never select the row
+            pos = event.position().toPoint()
+            index = self.list_view.indexAt(pos)
+            control = self.delegate.control_at(self.list_view.visualRect(index), pos) if index.isValid() else None
+            if control is None:
+                return False
+            if event.button() == Qt.LeftButton:
+                mask = self.model.mask_at(index.row())
+                if control == MaskItemDelegate.CHECKBOX and event.type() != QEvent.MouseButtonRelease:
+                    self.on_toggle_requested(mask)
+                elif control == MaskItemDelegate.DELETE and event.type() == QEvent.MouseButtonPress:
+                    self.mask_deleted.emit(mask)
+            return True
+        if obj is self.list_view and event.type() == QEvent.KeyPress and event.key() == Qt.Key_Space:
+            mask = self.model.mask_at(self.list_view.currentIndex().row())
+            if mask is not None:
+                self.on_toggle_requested(mask)
+            return True
+        return super().eventFilter(obj, event)
+    
+    def on_toggle_requested(self, mask):
+        self.mask_toggled.emit(mask, not mask.enabled)
+        self.model.refresh(mask)
     
-    def on_item_clicked(self, item):
-        index = self.list_widget.row(item)
-        if 0 <= index < len(self.masks):
-            self.mask_selected.emit(self.masks[index])
\ No newline at end of file
+    def on_item_clicked(self, index):
+        mask = self.model.mask_at(index.row())
+        if mask is not None:
+            self.mask_selected.emit(mask)
@@ -0,0 +1,61 @@
+import math
+import time
+from PySide6.QtCore import QObject, QTimer
+
+
+class UpdateScheduler(QObject):
+    # What changed since the last render; handlers OR these together
+    MASKS = 1
+    SPATIAL = 2
+    SPECTRUM = 4
+    ALL = MASKS | SPATIAL | SPECTRUM
+
+    def __init__(self, render, interval_ms: int = 16, parent=None):
+        super().__init__(parent)
+        self._render = render
+        self.interval_ms = interval_ms
+        self._dirty = 0
+        self._last_render = None
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+
+        self.requested = 0
+        self.executed = 0
+        self.skipped = 0
+
+    @property
+    def pending(self) -> int:
+        return self._dirty
+
+    def request(self, changes: int = ALL) -> None:
+        self.requested += 1
+        if self._dirty:
+            # Merged into the render that is already scheduled
+            self.skipped += 1
+        self._dirty |= changes
+
+        if not self._timer.isActive():
+            # Render on the next event loop pass, but never more than once per interval
+            delay = 0
+            if self._last_render is not None:
+                elapsed_ms = (time.perf_counter() - self._last_render) * 1000
+                delay = max(math.ceil(self.interval_ms - elapsed_ms), 0)
+            self._timer.start(delay)
+
+    def flush(self) -> None:
+        self._timer.stop()
+        changes, self._dirty = self._dirty, 0
+        if not changes:
+            return
+        self._last_render = time.perf_counter()
+        self.executed += 1
+        self._render(changes)
+
+    def cancel(self) -> None:
+        self._timer.stop()
+        self._dirty = 0
+
+    def stats(self) -> dict:
+        return {"requested": self.requested, "executed": self.executed, "skipped": self.skipped}
@@ -1,11 +1,71 @@
+import os
 import numpy as np
+from enum import Enum
 from PIL import Image
 import cv2
 
 
+# Single-channel modes that carry more than 8 bits and must not go through convert('L')
+HIGH_BIT_MODES = ('I;16', 'I;16L', 'I;16B', 'I;16N', 'I', 'F')
+
+_CONVERT_ROWS = 256
+
+
+class ExportFormat(Enum):
+    DISPLAY_8BIT = "8-bit (display)"
+    TIFF_16BIT = "16-bit TIFF"
+    TIFF_FLOAT32 = "32-bit float TIFF"
+    NPY = "NumPy array"
+
+
+def decode_grayscale(filepath: str) -> np.ndarray:
+    # Keeps the file's own sample type (uint8, uint16, int32 or float32)
+    img = Image.open(filepath)
+    if img.mode not in HIGH_BIT_MODES:
+        img = img.convert('L')
+    return np.array(img)
+
+
 def load_image_as_grayscale(filepath: str) -> np.ndarray:
-    img = Image.open(filepath).convert('L')
-    return np.array(img, dtype=np.float64)
+    return decode_grayscale(filepath).astype(np.float64)
+
+
+def export_format_for_path(filepath: str) -> ExportFormat:
+    ext = os.path.splitext(filepath)[1].lower()
+    if ext == '.npy':
+        return ExportFormat.NPY
+    if ext in ('.tif', '.tiff'):
+        return ExportFormat.TIFF_FLOAT32
+    return ExportFormat.DISPLAY_8BIT
+
+
+def export_image(array: np.ndarray, filepath: str, fmt: ExportFormat = None) -> None:
+    if fmt is None:
+        fmt = export_format_for_path(filepath)
+    
+    if fmt == ExportFormat.NPY:
+        np.save(filepath, array)
+    
+    elif fmt == ExportFormat.TIFF_16BIT:
+        # Round and clip row blocks straight into the output so no full-size float temporary is made
+        out = np.empty(array.shape, dtype=np.uint16)
+        scratch = np.empty((min(_CONVERT_ROWS, array.shape[0]),) + array.shape[1:], dtype=array.dtype)
+        for start in range(0, array.shape[0], _CONVERT_ROWS):
+            block = scratch[:min(_CONVERT_ROWS, array.shape[0] - start)]
+            np.clip(array[start:start + len(block)], 0, 65535, out=block)
+            np.rint(block, out=out[start:start + len(block)], casting='unsafe')
+        _write_tiff(filepath, out)
+    
+    elif fmt == ExportFormat.TIFF_FLOAT32:
+        _write_tiff(filepath, array.astype(np.float32, copy=False))
+    
+    else:
+        Image.fromarray(normalize_for_display(array)).save(filepath)
+
+
+def _write_tiff(filepath: str, array: np.ndarray) -> None:
+    if not cv2.imwrite(filepath, array):
+        raise IOError(f"Could not write {filepath}")
 
 
 def numpy_to_qimage(array: np.ndarray):